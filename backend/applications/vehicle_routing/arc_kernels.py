@@ -0,0 +1,36 @@
+# backend/applications/vehicle_routing/arc_kernels.py
+
+"""
+Index kernels for building route-variable expressions.
+
+Used by EnhancedConstraintApplier to locate the incoming arcs of a node in the
+flattened (N, N, K) route-variable array.
+"""
+
+import numpy as np
+
+try:
+    from .kernel_jit import jit_kernel
+except ImportError:
+    from kernel_jit import jit_kernel
+
+
+def _incoming_arc_indices_loop(node_pos, n_nodes, vehicle_count):
+    # Row k holds the flat indices of x[i, node, k] for every i != node
+    out = np.empty((vehicle_count, n_nodes - 1), dtype=np.int64)
+    for k in range(vehicle_count):
+        col = 0
+        for i in range(n_nodes):
+            if i != node_pos:
+                out[k, col] = (i * n_nodes + node_pos) * vehicle_count + k
+                col += 1
+    return out
+
+
+def _incoming_arc_indices_numpy(node_pos, n_nodes, vehicle_count):
+    preds = np.delete(np.arange(n_nodes, dtype=np.int64), node_pos)
+    base = (preds * n_nodes + node_pos) * vehicle_count
+    return base[np.newaxis, :] + np.arange(vehicle_count, dtype=np.int64)[:, np.newaxis]
+
+
+incoming_arc_indices = jit_kernel(_incoming_arc_indices_loop, _incoming_arc_indices_numpy)
@@ -1,21 +1,102 @@
 # backend/applications/vehicle_routing/constraint_patterns.py
 
+import functools
+import logging
 import re
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, NamedTuple, Tuple, Optional
+from types import MappingProxyType
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+    re2 = None
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    ahocorasick = None
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+    hyperscan = None
+
+logger = logging.getLogger(__name__)
+
+
+# Literal words every pattern in a category requires; a prompt containing none of a
+# category's keywords cannot match any of its patterns, so those regexes are skipped.
+CATEGORY_KEYWORDS = {
+    'capacity': ('vehicle', 'load', 'capacity'),
+    'time_window': ('before', 'by', 'between'),
+    'distance': ('distance',),
+    'working_hours': ('hour',),
+    'vehicle_restriction': ('visit',),
+    'priority': ('priority', 'first'),
+    'vehicle_count': ('vehicle',),
+}
+
+
+def _compile_pattern(pattern: str):
+    """Compile with RE2 when installed (linear-time, no backtracking), else stdlib re"""
+    if RE2_AVAILABLE:
+        return re2.compile(f"(?i){pattern}")
+    return re.compile(pattern, re.IGNORECASE)
 
 
-@dataclass
 class ConstraintPattern:
-    pattern: str
+    __slots__ = ('pattern', 'compiled', 'constraint_type', 'parameter_groups', 'conversion_function',
+                 'conversion_callable', '_param_slots')
+
+    def __init__(self, pattern: str, constraint_type: str, parameter_groups: List[str],
+                 conversion_function: str):
+        self.pattern = pattern
+        self.constraint_type = constraint_type
+        self.parameter_groups = tuple(parameter_groups)
+        self.conversion_function = conversion_function
+        # Bound ConstraintConverter method, resolved once by VRPConstraintMatcher
+        self.conversion_callable = None
+        # Compile once here instead of going through the re module cache on every match
+        self.compiled = _compile_pattern(pattern)
+        # (0-based group position, parameter name) for every parameter the pattern captures
+        self._param_slots = tuple(enumerate(self.parameter_groups[:self.compiled.groups]))
+
+    def __repr__(self) -> str:
+        return f"ConstraintPattern(pattern={self.pattern!r}, constraint_type={self.constraint_type!r})"
+
+
+class MatchResult(NamedTuple):
+    """Outcome of matching a prompt against the constraint patterns"""
     constraint_type: str
-    parameter_groups: List[str]
+    parameters: Dict[str, str]
     conversion_function: str
+    conversion_callable: Callable[[Dict, Dict], Dict]
+    original_prompt: str
+    matched_pattern: str
+    # Captured values in the pattern's parameter_groups order, None where a group didn't match
+    parameter_values: Tuple[Optional[str], ...]
 
 
 class VRPConstraintMatcher:
-    def __init__(self):
+    def __init__(self, converter: Optional['ConstraintConverter'] = None):
+        self.converter = converter or ConstraintConverter()
         self.patterns = self._define_patterns()
+        for patterns in self.patterns.values():
+            for pattern_obj in patterns:
+                pattern_obj.conversion_callable = getattr(self.converter, pattern_obj.conversion_function)
+        self._pattern_list = [p for patterns in self.patterns.values() for p in patterns]
+        self.hyperscan_db = self._build_hyperscan_database()
+        self.keyword_automaton = self._build_keyword_automaton()
+        # Combined regexes keyed by the set of categories they cover, built on first use
+        self._scanners: Dict[frozenset, Tuple[re.Pattern, Dict]] = {}
+        # Matching is pure over the prompt, so repeated prompts are served from an LRU cache
+        self._match_cached = functools.lru_cache(maxsize=4096)(self._match_uncached)
 
     def _define_patterns(self) -> Dict[str, List[ConstraintPattern]]:
         return {
@@ -175,33 +256,234 @@ class VRPConstraintMatcher:
             ]
         }
 
-    def match_constraint(self, prompt: str) -> Optional[Tuple[str, Dict]]:
-        """Match prompt against predefined patterns"""
-        prompt_lower = prompt.lower().strip()
+    def _build_hyperscan_database(self):
+        """Compile every pattern into one Hyperscan database, with the pattern's position as its id"""
+        if not HYPERSCAN_AVAILABLE:
+            return None
+
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=[p.pattern.encode('utf-8') for p in self._pattern_list],
+                ids=list(range(len(self._pattern_list))),
+                elements=len(self._pattern_list),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+                       | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP] * len(self._pattern_list)
+            )
+            return db
+        except Exception as e:
+            logger.debug("Hyperscan database unavailable, using regex matching: %s", e)
+            return None
+
+    def _first_hyperscan_match(self, prompt: str) -> Optional[ConstraintPattern]:
+        """Scan the prompt once for all patterns and return the first one (in definition order) that matches"""
+        matched_ids = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            matched_ids.add(pattern_id)
+
+        self.hyperscan_db.scan(prompt.encode('utf-8'), match_event_handler=on_match)
+        return self._pattern_list[min(matched_ids)] if matched_ids else None
+
+    def _build_keyword_automaton(self):
+        """Build an Aho-Corasick automaton mapping each keyword to the categories it triggers"""
+        if not AHOCORASICK_AVAILABLE:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for category, keywords in CATEGORY_KEYWORDS.items():
+            for keyword in keywords:
+                automaton.add_word(keyword, automaton.get(keyword, ()) + (category,))
+        automaton.make_automaton()
+        return automaton
+
+    def _triggered_categories(self, text: str) -> frozenset:
+        """Categories whose keywords occur in the text (single pass when pyahocorasick is installed)"""
+        text = text.casefold()
+        if self.keyword_automaton is not None:
+            return frozenset(
+                category
+                for _, categories in self.keyword_automaton.iter(text)
+                for category in categories
+            )
+        return frozenset(
+            category for category, keywords in CATEGORY_KEYWORDS.items()
+            if any(keyword in text for keyword in keywords)
+        )
+
+    def _get_scanner(self, categories: frozenset) -> Tuple[re.Pattern, Dict[str, Tuple[ConstraintPattern, Tuple]]]:
+        """Return the combined regex for a set of categories, compiling it on first use"""
+        scanner = self._scanners.get(categories)
+        if scanner is None:
+            scanner = self._scanners[categories] = self._combine_patterns(categories)
+        return scanner
+
+    def _combine_patterns(self, categories: frozenset) -> Tuple[re.Pattern, Dict[str, Tuple[ConstraintPattern, Tuple]]]:
+        """Fuse the patterns of the given categories into a single regex with one named group per pattern.
+
+        Each alternative is wrapped in a lookahead anchored at the start of the prompt,
+        so the first pattern in definition order that matches anywhere still wins (a
+        bare alternation would prefer whichever pattern matches leftmost instead).
+        Returns the compiled regex and a map of group name -> (pattern, parameter slots),
+        where the slots are already shifted to the pattern's position in the combined
+        regex so a match needs nothing beyond one dict lookup on match.lastgroup.
+        """
+        branches = []
+        group_slots = {}
+        group_index = 1
 
         for category, patterns in self.patterns.items():
-            for pattern_obj in patterns:
-                match = re.search(pattern_obj.pattern, prompt_lower)
-                if match:
-                    # Extract parameters based on groups
-                    params = {}
-                    for i, param_name in enumerate(pattern_obj.parameter_groups):
-                        if i + 1 <= len(match.groups()) and match.group(i + 1):
-                            params[param_name] = match.group(i + 1)
-
-                    return pattern_obj.constraint_type, {
-                        'parameters': params,
-                        'conversion_function': pattern_obj.conversion_function,
-                        'original_prompt': prompt,
-                        'matched_pattern': pattern_obj.pattern
-                    }
-
-        return None
+            if category not in categories:
+                continue
+            for i, pattern_obj in enumerate(patterns):
+                group_name = f"{category}__{i}"
+                branches.append(rf"(?=[\s\S]*?(?P<{group_name}>{pattern_obj.pattern}))")
+                group_slots[group_name] = (pattern_obj, tuple(
+                    (group_index + i, param_name) for i, param_name in pattern_obj._param_slots
+                ))
+                group_index += 1 + pattern_obj.compiled.groups
+
+        combined = re.compile(r"\A(?:" + "|".join(branches) + ")", re.IGNORECASE)
+        return combined, group_slots
+
+    def match_constraint(self, prompt: str) -> Optional[MatchResult]:
+        """Match prompt against predefined patterns"""
+        result = self._match_cached(prompt)
+        if result is None:
+            return None
+
+        # Hand out a fresh parameters dict so callers can't mutate the cached entry
+        return result._replace(parameters=dict(result.parameters))
+
+    def match_constraints_batch(self, prompts: List[str]) -> List[Optional[MatchResult]]:
+        """Match many prompts in one call, e.g. for bulk constraint imports.
+
+        Prompts are scanned one at a time rather than as a single joined buffer: the
+        patterns use \\s and . freely, so a match could run across the separator into the
+        next prompt. Repeated prompts are answered from the match cache.
+        """
+        match_constraint = self.match_constraint
+        return [match_constraint(prompt) for prompt in prompts]
+
+    def _match_uncached(self, prompt: str) -> Optional[MatchResult]:
+        # Hyperscan finds the winning pattern in one pass; the regex then only extracts groups
+        if self.hyperscan_db is not None:
+            pattern_obj = self._first_hyperscan_match(prompt)
+            if pattern_obj is None:
+                return None
+            match = pattern_obj.compiled.search(prompt)
+            if match:
+                return self._build_match_result(pattern_obj, match, pattern_obj._param_slots, prompt)
+
+        # Patterns are case-insensitive and unanchored, so the prompt is scanned as-is
+        categories = self._triggered_categories(prompt)
+        if not categories:
+            return None
+
+        # RE2 has no lookahead support, so with RE2 the patterns are tried one by one instead
+        if RE2_AVAILABLE:
+            for category, patterns in self.patterns.items():
+                if category not in categories:
+                    continue
+                for pattern_obj in patterns:
+                    match = pattern_obj.compiled.search(prompt)
+                    if match:
+                        return self._build_match_result(pattern_obj, match, pattern_obj._param_slots, prompt)
+            return None
+
+        combined, group_slots = self._get_scanner(categories)
+        match = combined.match(prompt)
+        if not match:
+            return None
+
+        pattern_obj, param_slots = group_slots[match.lastgroup]
+        return self._build_match_result(pattern_obj, match, param_slots, prompt)
+
+    def _build_match_result(self, pattern_obj: ConstraintPattern, match, param_slots: Tuple,
+                            prompt: str) -> MatchResult:
+        """Extract parameters from match.groups() at the given (position, name) slots"""
+        groups = match.groups()
+        params = {param_name: groups[i] for i, param_name in param_slots if groups[i]}
+        values = tuple(groups[i] or None for i, _ in param_slots)
+
+        return MatchResult(
+            pattern_obj.constraint_type,
+            params,
+            pattern_obj.conversion_function,
+            pattern_obj.conversion_callable,
+            prompt,
+            pattern_obj.pattern,
+            values
+        )
 
 
 class ConstraintConverter:
     """Convert extracted parameters to mathematical constraints"""
 
+    # Static parts of the converted constraints, built once and filled in per call.
+    # The solver-format skeletons are read-only and copied on write, so every result
+    # shares their key and value strings instead of rebuilding the literals each time.
+    _CAPACITY_MATH_TPL = "sum(x_ij * demand_j for all j in route) <= {v}"
+    _CAPACITY_DESC_TPL = "Vehicle capacity must not exceed {v} {unit}"
+    _CAPACITY_SOLVER = MappingProxyType({
+        'constraint_type': 'linear',
+        'coefficients': 'demand_vector',
+        'operator': '<=',
+        'variables': 'route_variables'
+    })
+
+    _TIME_WINDOW_MATH_TPL = "{start} <= arrival_time_{customer} <= {end}"
+    _TIME_WINDOW_VAR_TPL = "arrival_time_{customer}"
+    _TIME_WINDOW_DESC_TPL = ("Customer {customer} must be visited between "
+                             "{sh:02d}:{sm:02d} and {eh:02d}:{em:02d}")
+    _DEADLINE_MATH_TPL = "arrival_time_{customer} <= {deadline}"
+    _DEADLINE_DESC_TPL = "Customer {customer} must be visited before {h:02d}:{m:02d}"
+    _TIME_WINDOW_SOLVER = MappingProxyType({'constraint_type': 'bound'})
+    _WINDOW_TIME_KEYS = (('start_hour', 'start_minute', 'start_period'), ('end_hour', 'end_minute', 'end_period'))
+    _DEADLINE_TIME_KEYS = (('hour', 'minute', 'period'),)
+    _WINDOW_PARAMS = ('customer_id', 'start_hour', 'start_minute', 'start_period', 'end_hour', 'end_minute',
+                      'end_period')
+    _DEADLINE_PARAMS = ('customer_id', 'hour', 'minute', 'period')
+    _DEADLINE_SOLVER = MappingProxyType({'constraint_type': 'linear', 'operator': '<='})
+
+    _DISTANCE_MATH_TPL = "sum(distance_ij * x_ij for all i,j) <= {v}"
+    _DISTANCE_DESC_TPL = "Total route distance must not exceed {v} {unit}"
+    _DISTANCE_SOLVER = MappingProxyType({
+        'constraint_type': 'linear',
+        'coefficients': 'distance_matrix',
+        'operator': '<=',
+        'variables': 'route_variables'
+    })
+
+    _WORKING_HOURS_MATH_TPL = "total_working_time <= {v}"
+    _WORKING_HOURS_DESC_TPL = "Driver cannot work more than {hours} hours ({minutes} minutes)"
+    _WORKING_HOURS_SOLVER = MappingProxyType({'constraint_type': 'linear', 'operator': '<='})
+
+    _RESTRICTION_VAR_TPL = "x_{vehicle}_{location}"
+    _RESTRICTION_MATH_TPL = "x_{vehicle}_{location} = 0"
+    _RESTRICTION_DESC_TPL = "Vehicle {vehicle} cannot visit location {location}"
+    _RESTRICTION_SOLVER = MappingProxyType({'constraint_type': 'binary_restriction', 'value': 0})
+
+    _PRIORITY_VAR_TPL = "priority_weight_{customer}"
+    _PRIORITY_MATH_TPL = "priority_weight_{customer} = 10"
+    _PRIORITY_DESC_TPL = "Customer {customer} has high priority"
+    _PRIORITY_SOLVER = MappingProxyType({'constraint_type': 'objective_weight', 'weight': 10})
+
+    _MIN_VEHICLES_MATH_TPL = "sum(vehicle_used_k for all k) >= {v}"
+    _MIN_VEHICLES_DESC_TPL = "At least {v} vehicle(s) must be used"
+    _MAX_VEHICLES_MATH_TPL = "sum(vehicle_used_k for all k) <= {v}"
+    _MAX_VEHICLES_DESC_TPL = "At most {v} vehicle(s) can be used"
+    _MIN_VEHICLES_SOLVER = MappingProxyType({
+        'constraint_type': 'linear',
+        'coefficients': 'vehicle_usage_vector',
+        'operator': '>='
+    })
+    _MAX_VEHICLES_SOLVER = MappingProxyType({
+        'constraint_type': 'linear',
+        'coefficients': 'vehicle_usage_vector',
+        'operator': '<='
+    })
+
     def convert_capacity_constraint(self, params: Dict, context: Dict) -> Dict:
         """Convert capacity constraint to mathematical format"""
         capacity_value = float(params['capacity_value'])
@@ -209,65 +491,101 @@ class ConstraintConverter:
 
         return {
             'type': 'capacity',
-            'mathematical_form': f"sum(x_ij * demand_j for all j in route) <= {capacity_value}",
-            'solver_format': {
-                'constraint_type': 'linear',
-                'coefficients': 'demand_vector',
-                'operator': '<=',
-                'rhs': capacity_value,
-                'variables': 'route_variables'
-            },
+            'mathematical_form': self._CAPACITY_MATH_TPL.format(v=capacity_value),
+            'solver_format': dict(self._CAPACITY_SOLVER, rhs=capacity_value),
             'unit': unit,
-            'description': f"Vehicle capacity must not exceed {capacity_value} {unit}"
+            'description': self._CAPACITY_DESC_TPL.format(v=capacity_value, unit=unit)
         }
 
     def convert_time_window_constraint(self, params: Dict, context: Dict) -> Dict:
         """Convert time window constraint to mathematical format"""
-        customer_id = params['customer_id']
+        param_names = self._WINDOW_PARAMS if 'start_hour' in params else self._DEADLINE_PARAMS
+        return self.convert_time_window_values(tuple(map(params.get, param_names)), context)
+
+    def convert_time_window_values(self, values: Tuple[Optional[str], ...], context: Dict) -> Dict:
+        """Convert a time window given as a fixed-arity tuple, e.g. MatchResult.parameter_values.
+
+        Windows are (customer_id, start_hour, start_minute, start_period, end_hour, end_minute,
+        end_period) and deadlines (customer_id, hour, minute, period); missing parts are None.
+        """
+        if len(values) == len(self._WINDOW_PARAMS):  # Time window constraint
+            customer_id, start_hour, start_minute, start_period, end_hour, end_minute, end_period = values
+            start_time = self._convert_to_minutes(start_hour, start_minute, start_period)
+            end_time = self._convert_to_minutes(end_hour, end_minute, end_period)
+            return self._time_window_result(customer_id, start_time, end_time)
+        else:  # Before constraint
+            customer_id, hour, minute, period = values
+            deadline = self._convert_to_minutes(hour, minute, period)
+            return self._deadline_result(customer_id, deadline)
+
+    def convert_time_window_constraints_batch(self, params_list: List[Dict], context: Dict) -> List[Dict]:
+        """Convert many time window constraints at once, vectorizing the time arithmetic"""
+        import numpy as np
+        try:
+            from .time_kernels import to_minutes, period_code
+        except ImportError:
+            from time_kernels import to_minutes, period_code
+
+        # Each window contributes a start and an end time, each deadline a single time
+        hours, minutes, periods = [], [], []
+        for params in params_list:
+            time_keys = self._WINDOW_TIME_KEYS if 'start_hour' in params else self._DEADLINE_TIME_KEYS
+            for hour_key, minute_key, period_key in time_keys:
+                hours.append(int(params[hour_key]))
+                minutes.append(int(params.get(minute_key) or 0))
+                periods.append(period_code(params.get(period_key, '')))
+
+        times = to_minutes(
+            np.array(hours, dtype=np.int64),
+            np.array(minutes, dtype=np.int64),
+            np.array(periods, dtype=np.int64)
+        ).tolist()
+
+        results = []
+        position = 0
+        for params in params_list:
+            if 'start_hour' in params:
+                results.append(self._time_window_result(params['customer_id'], times[position], times[position + 1]))
+                position += 2
+            else:
+                results.append(self._deadline_result(params['customer_id'], times[position]))
+                position += 1
+
+        return results
+
+    def _time_window_result(self, customer_id: str, start_time: int, end_time: int) -> Dict:
+        sh, sm = divmod(start_time, 60)
+        eh, em = divmod(end_time, 60)
 
-        if 'start_hour' in params:  # Time window constraint
-            start_time = self._convert_to_minutes(
-                params['start_hour'],
-                params.get('start_minute', '0'),
-                params.get('start_period', '')
-            )
-            end_time = self._convert_to_minutes(
-                params['end_hour'],
-                params.get('end_minute', '0'),
-                params.get('end_period', '')
-            )
+        return {
+            'type': 'time_window',
+            'customer': customer_id,
+            'mathematical_form': self._TIME_WINDOW_MATH_TPL.format(
+                start=start_time, customer=customer_id, end=end_time),
+            'solver_format': {
+                **self._TIME_WINDOW_SOLVER,
+                'variable': self._TIME_WINDOW_VAR_TPL.format(customer=customer_id),
+                'lower_bound': start_time,
+                'upper_bound': end_time
+            },
+            'description': self._TIME_WINDOW_DESC_TPL.format(
+                customer=customer_id, sh=sh, sm=sm, eh=eh, em=em)
+        }
 
-            return {
-                'type': 'time_window',
-                'customer': customer_id,
-                'mathematical_form': f"{start_time} <= arrival_time_{customer_id} <= {end_time}",
-                'solver_format': {
-                    'constraint_type': 'bound',
-                    'variable': f'arrival_time_{customer_id}',
-                    'lower_bound': start_time,
-                    'upper_bound': end_time
-                },
-                'description': f"Customer {customer_id} must be visited between {start_time // 60:02d}:{start_time % 60:02d} and {end_time // 60:02d}:{end_time % 60:02d}"
-            }
-        else:  # Before constraint
-            deadline = self._convert_to_minutes(
-                params['hour'],
-                params.get('minute', '0'),
-                params.get('period', '')
-            )
+    def _deadline_result(self, customer_id: str, deadline: int) -> Dict:
+        h, m = divmod(deadline, 60)
 
-            return {
-                'type': 'deadline',
-                'customer': customer_id,
-                'mathematical_form': f"arrival_time_{customer_id} <= {deadline}",
-                'solver_format': {
-                    'constraint_type': 'linear',
-                    'coefficients': {f'arrival_time_{customer_id}': 1},
-                    'operator': '<=',
-                    'rhs': deadline
-                },
-                'description': f"Customer {customer_id} must be visited before {deadline // 60:02d}:{deadline % 60:02d}"
-            }
+        return {
+            'type': 'deadline',
+            'customer': customer_id,
+            'mathematical_form': self._DEADLINE_MATH_TPL.format(customer=customer_id, deadline=deadline),
+            'solver_format': {
+                **self._DEADLINE_SOLVER,
+                'coefficients': {self._TIME_WINDOW_VAR_TPL.format(customer=customer_id): 1},
+                'rhs': deadline
+            },
+            'description': self._DEADLINE_DESC_TPL.format(customer=customer_id, h=h, m=m)
+        }
 
     def convert_distance_constraint(self, params: Dict, context: Dict) -> Dict:
         """Convert distance constraint to mathematical format"""
@@ -276,16 +594,10 @@ class ConstraintConverter:
 
         return {
             'type': 'distance',
-            'mathematical_form': f"sum(distance_ij * x_ij for all i,j) <= {distance_value}",
-            'solver_format': {
-                'constraint_type': 'linear',
-                'coefficients': 'distance_matrix',
-                'operator': '<=',
-                'rhs': distance_value,
-                'variables': 'route_variables'
-            },
+            'mathematical_form': self._DISTANCE_MATH_TPL.format(v=distance_value),
+            'solver_format': dict(self._DISTANCE_SOLVER, rhs=distance_value),
             'unit': unit,
-            'description': f"Total route distance must not exceed {distance_value} {unit}"
+            'description': self._DISTANCE_DESC_TPL.format(v=distance_value, unit=unit)
         }
 
     def convert_working_hours_constraint(self, params: Dict, context: Dict) -> Dict:
@@ -295,14 +607,13 @@ class ConstraintConverter:
 
         return {
             'type': 'working_hours',
-            'mathematical_form': f"total_working_time <= {max_minutes}",
+            'mathematical_form': self._WORKING_HOURS_MATH_TPL.format(v=max_minutes),
             'solver_format': {
-                'constraint_type': 'linear',
+                **self._WORKING_HOURS_SOLVER,
                 'coefficients': {'working_time': 1},
-                'operator': '<=',
                 'rhs': max_minutes
             },
-            'description': f"Driver cannot work more than {max_hours} hours ({max_minutes} minutes)"
+            'description': self._WORKING_HOURS_DESC_TPL.format(hours=max_hours, minutes=max_minutes)
         }
 
     def convert_vehicle_restriction_constraint(self, params: Dict, context: Dict) -> Dict:
@@ -314,13 +625,12 @@ class ConstraintConverter:
             'type': 'vehicle_restriction',
             'vehicle': vehicle_id,
             'location': location_id,
-            'mathematical_form': f"x_{vehicle_id}_{location_id} = 0",
+            'mathematical_form': self._RESTRICTION_MATH_TPL.format(vehicle=vehicle_id, location=location_id),
             'solver_format': {
-                'constraint_type': 'binary_restriction',
-                'variable': f'x_{vehicle_id}_{location_id}',
-                'value': 0
+                **self._RESTRICTION_SOLVER,
+                'variable': self._RESTRICTION_VAR_TPL.format(vehicle=vehicle_id, location=location_id)
             },
-            'description': f"Vehicle {vehicle_id} cannot visit location {location_id}"
+            'description': self._RESTRICTION_DESC_TPL.format(vehicle=vehicle_id, location=location_id)
         }
 
     def convert_priority_constraint(self, params: Dict, context: Dict) -> Dict:
@@ -330,13 +640,12 @@ class ConstraintConverter:
         return {
             'type': 'priority',
             'customer': customer_id,
-            'mathematical_form': f"priority_weight_{customer_id} = 10",
+            'mathematical_form': self._PRIORITY_MATH_TPL.format(customer=customer_id),
             'solver_format': {
-                'constraint_type': 'objective_weight',
-                'variable': f'priority_weight_{customer_id}',
-                'weight': 10
+                **self._PRIORITY_SOLVER,
+                'variable': self._PRIORITY_VAR_TPL.format(customer=customer_id)
             },
-            'description': f"Customer {customer_id} has high priority"
+            'description': self._PRIORITY_DESC_TPL.format(customer=customer_id)
         }
 
     def convert_vehicle_count_constraint(self, params: Dict, context: Dict) -> Dict:
@@ -345,39 +654,33 @@ class ConstraintConverter:
             min_vehicles = int(params['min_vehicles'])
             return {
                 'type': 'min_vehicles',
-                'mathematical_form': f"sum(vehicle_used_k for all k) >= {min_vehicles}",
-                'solver_format': {
-                    'constraint_type': 'linear',
-                    'coefficients': 'vehicle_usage_vector',
-                    'operator': '>=',
-                    'rhs': min_vehicles
-                },
+                'mathematical_form': self._MIN_VEHICLES_MATH_TPL.format(v=min_vehicles),
+                'solver_format': dict(self._MIN_VEHICLES_SOLVER, rhs=min_vehicles),
                 'min_vehicles': min_vehicles,
-                'description': f"At least {min_vehicles} vehicle(s) must be used"
+                'description': self._MIN_VEHICLES_DESC_TPL.format(v=min_vehicles)
             }
         else:  # max_vehicles
             max_vehicles = int(params['max_vehicles'])
             return {
                 'type': 'max_vehicles',
-                'mathematical_form': f"sum(vehicle_used_k for all k) <= {max_vehicles}",
-                'solver_format': {
-                    'constraint_type': 'linear',
-                    'coefficients': 'vehicle_usage_vector',
-                    'operator': '<=',
-                    'rhs': max_vehicles
-                },
+                'mathematical_form': self._MAX_VEHICLES_MATH_TPL.format(v=max_vehicles),
+                'solver_format': dict(self._MAX_VEHICLES_SOLVER, rhs=max_vehicles),
                 'max_vehicles': max_vehicles,
-                'description': f"At most {max_vehicles} vehicle(s) can be used"
+                'description': self._MAX_VEHICLES_DESC_TPL.format(v=max_vehicles)
             }
 
-    def _convert_to_minutes(self, hour: str, minute: str = '0', period: str = '') -> int:
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _convert_to_minutes(hour: str, minute: str = '0', period: str = '', /) -> int:
         """Convert time to minutes from midnight"""
         h = int(hour)
         m = int(minute) if minute else 0
 
-        if period.upper() == 'PM' and h != 12:
-            h += 12
-        elif period.upper() == 'AM' and h == 12:
+        # period is only ever a captured am/pm in any case, so its first letter decides
+        if period and period[0] in ('p', 'P'):
+            if h != 12:
+                h += 12
+        elif period and period[0] in ('a', 'A') and h == 12:
             h = 0
 
-        return h * 60 + m
\ No newline at end of file
+        return h * 60 + m
@@ -2,9 +2,13 @@
 
 from typing import Dict, List, Optional, Tuple
 import json
+import re
 from .constraint_patterns import VRPConstraintMatcher, ConstraintConverter
 from .llm_parser import LLMConstraintParser, ConstraintValidator
 
+# Common filler words that don't affect meaning, removed regardless of case
+_FILLER_WORDS_RE = re.compile(r'please|kindly|can you|i want|i need', re.IGNORECASE)
+
 
 class ConstraintProcessor:
     """
@@ -16,8 +20,8 @@ class ConstraintProcessor:
     """
 
     def __init__(self, use_llm: bool = False, llm_api_key: Optional[str] = None):
-        self.constraint_matcher = VRPConstraintMatcher()
         self.constraint_converter = ConstraintConverter()
+        self.constraint_matcher = VRPConstraintMatcher(self.constraint_converter)
         self.llm_parser = LLMConstraintParser(llm_api_key) if use_llm else None
         self.processed_constraints = []
 
@@ -49,20 +53,17 @@ class ConstraintProcessor:
             pattern_result = self.constraint_matcher.match_constraint(normalized_prompt)
 
             if pattern_result:
-                constraint_type, match_info = pattern_result
-
                 # Convert using pattern-based converter
-                converter_func = getattr(self.constraint_converter, match_info['conversion_function'])
-                mathematical_constraint = converter_func(
-                    match_info['parameters'],
+                mathematical_constraint = pattern_result.conversion_callable(
+                    pattern_result.parameters,
                     problem_context
                 )
 
                 processed_constraint = {
                     'original_prompt': prompt,
                     'normalized_prompt': normalized_prompt,
-                    'constraint_type': constraint_type,
-                    'parameters': match_info['parameters'],
+                    'constraint_type': pattern_result.constraint_type,
+                    'parameters': pattern_result.parameters,
                     'mathematical_format': mathematical_constraint,
                     'parsing_method': 'pattern_matching',
                     'confidence': 0.95
@@ -120,6 +121,16 @@ class ConstraintProcessor:
 
         processed_constraints = []
 
+        # Parse every constraint the patterns miss in batched LLM calls up front; the
+        # per-constraint parses below are then served from the parser's cache
+        if self.llm_parser and self.llm_parser.is_available():
+            unmatched = [
+                prompt for prompt in constraints
+                if not self.constraint_matcher.match_constraint(self._normalize_prompt(prompt))
+            ]
+            if len(unmatched) > 1:
+                self.llm_parser.parse_constraints_batch(unmatched, problem_context)
+
         # Process each constraint
         for i, constraint_prompt in enumerate(constraints):
             result = self.process_constraint(constraint_prompt, problem_context)
@@ -152,13 +163,8 @@ class ConstraintProcessor:
         # Remove extra whitespace
         normalized = ' '.join(prompt.split())
 
-        # Convert to lowercase for pattern matching
-        normalized = normalized.lower()
-
-        # Remove common filler words that don't affect meaning
-        filler_words = ['please', 'kindly', 'can you', 'i want', 'i need']
-        for filler in filler_words:
-            normalized = normalized.replace(filler, '')
+        # Patterns match case-insensitively, so keep the original case (e.g. customer IDs)
+        normalized = _FILLER_WORDS_RE.sub('', normalized)
 
         # Clean up multiple spaces
         normalized = ' '.join(normalized.split())
@@ -4,12 +4,19 @@ Enhanced Constraint Applier for Complex VRP Constraints
 Applies advanced routing constraints to the PuLP optimization model
 """
 
-from typing import Dict, List, Any
-from pulp import lpSum, LpVariable
+import logging
+from itertools import repeat
+from typing import Any, Dict, List, NamedTuple
+import numpy as np
+from pulp import (
+    lpSum, LpVariable, LpBinary, LpAffineExpression, LpConstraint,
+    LpConstraintEQ, LpConstraintGE, LpConstraintLE, PulpError
+)
 
 # Import with absolute path to avoid relative import issues
 try:
     from enhanced_constraint_parser import ParsedConstraint, ConstraintEntity
+    from arc_kernels import incoming_arc_indices
 except ImportError:
     # Fallback for when running as a module
     import sys
@@ -17,16 +24,125 @@ except ImportError:
     current_dir = os.path.dirname(os.path.abspath(__file__))
     sys.path.append(current_dir)
     from enhanced_constraint_parser import ParsedConstraint, ConstraintEntity
+    from arc_kernels import incoming_arc_indices
+
+
+logger = logging.getLogger(__name__)
+
+class ModelVars(NamedTuple):
+    """Model data shared by every constraint handler in one apply_constraints_to_model call"""
+    nodes: Any
+    vehicle_count: int
+    vehicle_capacity: Any
+    demand: Any
+    used_k: Any
+    x: Any
+    u: Any
 
 
 class EnhancedConstraintApplier:
     """Applies complex constraints to VRP optimization models"""
     
-    def __init__(self, problem_context: Dict = None):
+    def __init__(self, problem_context: Dict = None, debug_names: bool = False):
         self.problem_context = problem_context or {}
+        # Descriptive constraint names are only worth building when reading LP files
+        self.debug_names = debug_names
         self.applied_constraints = []
         self.constraint_counters = {}
+        # Dense (N, N, K) view of the route variables, rebuilt only when a new x is passed in
+        self._x_source = None
+        self._x_array = None
+        self._x_pos = {}
+        self._node_set = set()
+        # Constraints built by the handlers, merged into the model once all have run
+        self._pending: List[LpConstraint] = []
+        self._pending_names = set()
+        # BothServed_* binaries per grouped node pair, so a pair is only coupled once per model
+        self._both_served_prob = None
+        self._both_served_cache: Dict[frozenset, Dict[int, LpVariable]] = {}
+        # constraint_type -> handler(prob, constraint, model, constraint_id)
+        self._dispatch = {
+            "node_separation": lambda prob, c, m, cid: self._apply_node_separation(
+                prob, c, m.nodes, m.vehicle_count, m.x, cid),
+            "node_grouping": lambda prob, c, m, cid: self._apply_node_grouping(
+                prob, c, m.nodes, m.vehicle_count, m.x, cid),
+            "vehicle_assignment": lambda prob, c, m, cid: self._apply_vehicle_assignment(
+                prob, c, m.nodes, m.vehicle_count, m.x, cid),
+            "vehicle_count": lambda prob, c, m, cid: self._apply_vehicle_count_constraint(
+                prob, c, m.vehicle_count, m.used_k, cid),
+            "multi_part": lambda prob, c, m, cid: self._apply_multi_part_constraint(
+                prob, c, m.nodes, m.vehicle_count, m.vehicle_capacity, m.demand, m.used_k, m.x, m.u, cid),
+        }
+        # Types that are only noted, never turned into rows: constraint_type -> note(constraint)
+        self._notes = {
+            "route_constraint": self._note_route_constraint,
+            "priority": self._note_priority_constraint,
+        }
+    
+    def _arc_array(self, x, nodes, vehicle_count):
+        """Materialize x[i, j, k] as an object array indexed by node position"""
+        if self._x_source is not x:
+            pos = {n: p for p, n in enumerate(nodes)}
+            X = np.empty((len(nodes), len(nodes), vehicle_count), dtype=object)
+            for (i, j, k), var in x.items():
+                X[pos[i], pos[j], k] = var
+            self._x_source, self._x_array, self._x_pos = x, X, pos
+        return self._x_array, self._x_pos
+    
+    def _visit_sums(self, x, nodes, targets, vehicles) -> Dict:
+        """Build each (node, vehicle) incoming-arc sum once so every constraint reuses it"""
+        X, pos = self._arc_array(x, nodes, len(vehicles))
+        n_nodes, _, vehicle_count = X.shape
+        x_flat = X.reshape(-1)
+        visit = {}
+        for n in targets:
+            # Row k: flat positions of x[i, n, k] for every predecessor i != n
+            idx = incoming_arc_indices(pos[n], n_nodes, vehicle_count)
+            for k in vehicles:
+                visit[n, k] = LpAffineExpression(zip(x_flat[idx[k]].tolist(), repeat(1)))
+        return visit
+    
+    def _add_pair_coupling(self, cons: List[LpConstraint], visit: Dict, node1, node2, vehicle_count,
+                           prefix: str, constraint_id: str) -> Dict[int, LpVariable]:
+        """Add rows tying both nodes to one shared vehicle; returns the BothServed vars"""
+        # visit[node1, k] == both_served[k] == visit[node2, k], so per-vehicle equality
+        # and cross-vehicle exclusion constraints are implied and not added separately.
+        both_served_vars = {}
+        for k in range(vehicle_count):
+            both_served_vars[k] = LpVariable(f"{prefix}BothServed_{node1}_{node2}_V{k}_{constraint_id}", cat=LpBinary)
+            
+            # Either node is served by vehicle k exactly when both_served[k] = 1
+            name = f"{prefix}Link1_{node1}_{node2}_V{k}_{constraint_id}" if self.debug_names else None
+            cons.append(LpConstraint(visit[node1, k] - both_served_vars[k], LpConstraintEQ, name))
+            name = f"{prefix}Link2_{node1}_{node2}_V{k}_{constraint_id}" if self.debug_names else None
+            cons.append(LpConstraint(visit[node2, k] - both_served_vars[k], LpConstraintEQ, name))
         
+        # Ensure exactly one vehicle serves both nodes (if they are served at all)
+        name = f"{prefix}OnlyOne_{node1}_{node2}_{constraint_id}" if self.debug_names else None
+        cons.append(LpConstraint(lpSum(both_served_vars.values()), LpConstraintLE, name, 1))
+        return both_served_vars
+    
+    def _stage_constraints(self, prob, cons: List[LpConstraint]) -> int:
+        """Queue a handler's finished LpConstraint batch for the merge into prob"""
+        if self.debug_names:
+            names = {c.name for c in cons}
+            overlap = (prob.constraints.keys() | self._pending_names) & names
+            if overlap:
+                raise PulpError(f"overlapping constraint names: {sorted(overlap)}")
+            self._pending_names |= names
+        self._pending.extend(cons)
+        return len(cons)
+    
+    def _flush_constraints(self, prob):
+        """Add every staged constraint to the model in one call"""
+        if self.debug_names:
+            prob.extend({c.name: c for c in self._pending})
+        else:
+            # Unnamed constraints get PuLP's short generated names
+            prob.extend(self._pending)
+        self._pending = []
+        self._pending_names = set()
+    
     def apply_constraints_to_model(self, prob, constraints: List[ParsedConstraint], 
                                  nodes, vehicle_count, vehicle_capacity, demand, 
                                  used_k, x, u) -> Dict:
@@ -55,12 +171,18 @@ class EnhancedConstraintApplier:
             "constraint_details": []
         }
         
+        if prob is not self._both_served_prob:
+            self._both_served_prob = prob
+            self._both_served_cache = {}
+        model = ModelVars(nodes, vehicle_count, vehicle_capacity, demand, used_k, x, u)
+        # Membership checks in the handlers are hash lookups rather than list scans
+        self._node_set = set(nodes)
+        self._pending = []
+        self._pending_names = set()
+        
         for i, constraint in enumerate(constraints):
             try:
-                result = self._apply_single_constraint(
-                    prob, constraint, nodes, vehicle_count, vehicle_capacity, 
-                    demand, used_k, x, u, i
-                )
+                result = self._apply_single_constraint(prob, constraint, model, i)
                 
                 if result["success"]:
                     application_results["applied_successfully"] += 1
@@ -80,51 +202,36 @@ class EnhancedConstraintApplier:
                 )
                 print(f"[Enhanced Applier] Error applying constraint {i+1}: {e}")
         
+        # Handlers only build constraints; the model is extended once for the whole list
+        self._flush_constraints(prob)
+        
         return application_results
     
-    def _apply_single_constraint(self, prob, constraint: ParsedConstraint, 
-                               nodes, vehicle_count, vehicle_capacity, demand, 
-                               used_k, x, u, constraint_index: int) -> Dict:
+    def _apply_single_constraint(self, prob, constraint: ParsedConstraint, model: ModelVars,
+                               constraint_index: int) -> Dict:
         """Apply a single constraint to the model"""
         
         constraint_type = constraint.constraint_type
         constraint_id = f"{constraint_type}_{constraint_index}"
         
-        print(f"[Enhanced Applier] Applying {constraint_type} constraint: {constraint.interpretation}")
-        
-        try:
-            if constraint_type == "node_separation":
-                return self._apply_node_separation(prob, constraint, nodes, vehicle_count, x, constraint_id)
-            
-            elif constraint_type == "node_grouping":
-                return self._apply_node_grouping(prob, constraint, nodes, vehicle_count, x, constraint_id)
-            
-            elif constraint_type == "vehicle_assignment":
-                return self._apply_vehicle_assignment(prob, constraint, nodes, x, constraint_id)
-            
-            elif constraint_type == "route_constraint":
-                return self._apply_route_constraint(prob, constraint, nodes, vehicle_count, x, constraint_id)
-            
-            elif constraint_type == "vehicle_count":
-                return self._apply_vehicle_count_constraint(prob, constraint, vehicle_count, used_k, constraint_id)
-            
-            elif constraint_type == "multi_part":
-                return self._apply_multi_part_constraint(
-                    prob, constraint, nodes, vehicle_count, vehicle_capacity, 
-                    demand, used_k, x, u, constraint_id
-                )
-            
-            elif constraint_type == "priority":
-                return self._apply_priority_constraint(prob, constraint, nodes, vehicle_count, x, constraint_id)
+        # Noted-only types skip the per-constraint print and go straight to their result
+        note = self._notes.get(constraint_type)
+        if note is None:
+            print(f"[Enhanced Applier] Applying {constraint_type} constraint: {constraint.interpretation}")
             
-            else:
+            handler = self._dispatch.get(constraint_type)
+            if handler is None:
                 return {
                     "success": False,
                     "error": f"Unknown constraint type: {constraint_type}",
                     "constraint_type": constraint_type,
                     "mathematical_constraints_added": 0
                 }
-                
+        
+        try:
+            if note is not None:
+                return note(constraint)
+            return handler(prob, constraint, model, constraint_id)
         except Exception as e:
             return {
                 "success": False,
@@ -133,6 +240,32 @@ class EnhancedConstraintApplier:
                 "mathematical_constraints_added": 0
             }
     
+    def _note_route_constraint(self, constraint: ParsedConstraint) -> Dict:
+        """Note route-level limits (distance, time); they need the distance matrix to become rows"""
+        max_distance = float(constraint.parameters.get("max_distance", float('inf')))
+        logger.debug("Route constraint noted: max distance %s", max_distance)
+        return {
+            "success": True,
+            "constraint_type": "route_constraint",
+            "mathematical_constraints_added": 0,
+            "details": f"Route constraint noted (requires distance matrix): max distance {max_distance}",
+            "warning": "Route constraints require distance matrix integration for full implementation"
+        }
+    
+    def _note_priority_constraint(self, constraint: ParsedConstraint) -> Dict:
+        """Note service order preferences; they need preprocessing or objective changes to take effect"""
+        params = constraint.parameters
+        node = int(params["node"])
+        priority_level = params.get("priority_level", "high")
+        logger.debug("Priority constraint noted: node %s has %s priority", node, priority_level)
+        return {
+            "success": True,
+            "constraint_type": "priority",
+            "mathematical_constraints_added": 0,
+            "details": f"Priority constraint noted for node {node} ({priority_level})",
+            "warning": "Priority constraints require preprocessing or objective function modification"
+        }
+    
     def _apply_node_separation(self, prob, constraint: ParsedConstraint, nodes, 
                              vehicle_count, x, constraint_id: str) -> Dict:
         """Apply node separation constraints (nodes cannot be on same route)"""
@@ -142,7 +275,7 @@ class EnhancedConstraintApplier:
         node2 = int(params["node_2"])
         
         # Validate nodes exist
-        if node1 not in nodes or node2 not in nodes:
+        if node1 not in self._node_set or node2 not in self._node_set:
             return {
                 "success": False,
                 "error": f"Invalid nodes: {node1}, {node2} not in node set {nodes}",
@@ -150,18 +283,17 @@ class EnhancedConstraintApplier:
                 "mathematical_constraints_added": 0
             }
         
-        constraints_added = 0
+        visit = self._visit_sums(x, nodes, (node1, node2), range(vehicle_count))
+        cons = []
         
         # For each vehicle, ensure that if one node is served by the vehicle,
         # the other node is not served by the same vehicle
         for k in range(vehicle_count):
             # If node1 is visited by vehicle k, then node2 cannot be visited by vehicle k
-            prob += (
-                lpSum(x[i, node1, k] for i in nodes if i != node1) + 
-                lpSum(x[i, node2, k] for i in nodes if i != node2)
-            ) <= 1, f"NodeSeparation_{node1}_{node2}_Vehicle_{k}_{constraint_id}"
-            constraints_added += 1
+            name = f"NodeSeparation_{node1}_{node2}_Vehicle_{k}_{constraint_id}" if self.debug_names else None
+            cons.append(LpConstraint(visit[node1, k] + visit[node2, k], LpConstraintLE, name, 1))
         
+        constraints_added = self._stage_constraints(prob, cons)
         print(f"[Enhanced Applier] Applied node separation: nodes {node1} and {node2} cannot be on same route")
         
         return {
@@ -180,7 +312,7 @@ class EnhancedConstraintApplier:
         node2 = int(params["node_2"])
         
         # Validate nodes exist
-        if node1 not in nodes or node2 not in nodes:
+        if node1 not in self._node_set or node2 not in self._node_set:
             return {
                 "success": False,
                 "error": f"Invalid nodes: {node1}, {node2} not in node set {nodes}",
@@ -188,91 +320,25 @@ class EnhancedConstraintApplier:
                 "mathematical_constraints_added": 0
             }
         
-        constraints_added = 0
-        
-        # Method 1: For each vehicle k, ensure that both nodes have the same "visited" status
-        for k in range(vehicle_count):
-            # Both nodes must have the same incoming edge count for vehicle k
-            prob += (
-                lpSum(x[i, node1, k] for i in nodes if i != node1) == 
-                lpSum(x[i, node2, k] for i in nodes if i != node2)
-            ), f"NodeGrouping_Same_{node1}_{node2}_Vehicle_{k}_{constraint_id}"
-            constraints_added += 1
-        
-        # Method 2: Cross-vehicle exclusion - if any vehicle visits one node, no other vehicle can visit the other
-        for k in range(vehicle_count):
-            for other_k in range(vehicle_count):
-                if k != other_k:
-                    # If node1 is visited by vehicle k, then node2 cannot be visited by vehicle other_k
-                    prob += (
-                        lpSum(x[i, node1, k] for i in nodes if i != node1) + 
-                        lpSum(x[i, node2, other_k] for i in nodes if i != node2)
-                    ) <= 1, f"NodeGrouping_Exclusive_{node1}_{node2}_V{k}_V{other_k}_{constraint_id}"
-                    constraints_added += 1
-        
-        # Method 3: Strong coupling constraint - if either node is visited, both must be visited by the same vehicle
-        # This creates a binary variable for each vehicle indicating if both nodes are served by that vehicle
-        from pulp import LpVariable, LpBinary
-        
-        # Create auxiliary variables for each vehicle indicating if both nodes are served together
-        both_served_vars = {}
-        for k in range(vehicle_count):
-            both_served_vars[k] = LpVariable(f"BothServed_{node1}_{node2}_V{k}_{constraint_id}", cat=LpBinary)
-            
-            # If both_served[k] = 1, then both nodes must be served by vehicle k
-            prob += (
-                lpSum(x[i, node1, k] for i in nodes if i != node1) >= both_served_vars[k]
-            ), f"NodeGrouping_Force1_{node1}_{node2}_V{k}_{constraint_id}"
-            constraints_added += 1
-            
-            prob += (
-                lpSum(x[i, node2, k] for i in nodes if i != node2) >= both_served_vars[k]
-            ), f"NodeGrouping_Force2_{node1}_{node2}_V{k}_{constraint_id}"
-            constraints_added += 1
-            
-            # If either node is served by vehicle k, then both_served[k] must be 1
-            prob += (
-                both_served_vars[k] >= lpSum(x[i, node1, k] for i in nodes if i != node1)
-            ), f"NodeGrouping_Trigger1_{node1}_{node2}_V{k}_{constraint_id}"
-            constraints_added += 1
-            
-            prob += (
-                both_served_vars[k] >= lpSum(x[i, node2, k] for i in nodes if i != node2)
-            ), f"NodeGrouping_Trigger2_{node1}_{node2}_V{k}_{constraint_id}"
-            constraints_added += 1
-        
-        # Ensure exactly one vehicle serves both nodes (if they are served at all)
-        prob += (
-            lpSum(both_served_vars[k] for k in range(vehicle_count)) <= 1
-        ), f"NodeGrouping_OnlyOne_{node1}_{node2}_{constraint_id}"
-        constraints_added += 1
-        
-        # Method 4: ABSOLUTE ENFORCEMENT - Add penalty constraints with very high coefficients
-        # Create penalty variables for violations
-        penalty_vars = {}
-        for k in range(vehicle_count):
-            for other_k in range(vehicle_count):
-                if k != other_k:
-                    penalty_vars[f"{k}_{other_k}"] = LpVariable(f"Penalty_{node1}_{node2}_V{k}_V{other_k}_{constraint_id}", cat=LpBinary)
-                    
-                    # If node1 is on vehicle k and node2 is on vehicle other_k, penalty = 1
-                    prob += (
-                        penalty_vars[f"{k}_{other_k}"] >= 
-                        lpSum(x[i, node1, k] for i in nodes if i != node1) + 
-                        lpSum(x[i, node2, other_k] for i in nodes if i != node2) - 1
-                    ), f"NodeGrouping_PenaltyTrigger_{node1}_{node2}_V{k}_V{other_k}_{constraint_id}"
-                    constraints_added += 1
-        
-        # Add penalty to objective function (this will be handled by the solver)
-        # The penalty sum should be 0 for a valid solution
-        prob += (
-            lpSum(penalty_vars[key] for key in penalty_vars) == 0
-        ), f"NodeGrouping_NoPenalty_{node1}_{node2}_{constraint_id}"
-        constraints_added += 1
-        
+        visit = self._visit_sums(x, nodes, (node1, node2), range(vehicle_count))
+        cons = []
+        coupled = None
+        
+        # Strong coupling constraint - if either node is visited, both must be visited by the same vehicle.
+        # Together with the base model's visit-once rows this also rules out splitting the pair across
+        # vehicles, so no pairwise cross-vehicle block is needed.
+        # Skipped when an earlier constraint in this model already coupled the same pair
+        pair_key = frozenset((node1, node2))
+        if pair_key not in self._both_served_cache:
+            coupled = {pair_key: self._add_pair_coupling(
+                cons, visit, node1, node2, vehicle_count, "NodeGrouping_", constraint_id
+            )}
+        
+        constraints_added = self._stage_constraints(prob, cons)
+        if coupled:
+            self._both_served_cache.update(coupled)
         print(f"[Enhanced Applier] Applied ULTRA-STRONG node grouping: nodes {node1} and {node2} must be on same route")
         print(f"[Enhanced Applier] Added {constraints_added} mathematical constraints for ULTRA-STRONG grouping")
-        print(f"[Enhanced Applier] Penalty enforcement ensures absolute compliance")
         
         return {
             "success": True,
@@ -282,7 +348,7 @@ class EnhancedConstraintApplier:
         }
     
     def _apply_vehicle_assignment(self, prob, constraint: ParsedConstraint, nodes, 
-                                x, constraint_id: str) -> Dict:
+                                vehicle_count, x, constraint_id: str) -> Dict:
         """Apply vehicle assignment constraints (specific node to specific vehicle)"""
         
         params = constraint.parameters
@@ -290,7 +356,7 @@ class EnhancedConstraintApplier:
         vehicle = int(params["vehicle"])
         
         # Validate node exists
-        if node not in nodes:
+        if node not in self._node_set:
             return {
                 "success": False,
                 "error": f"Invalid node: {node} not in node set {nodes}",
@@ -298,22 +364,20 @@ class EnhancedConstraintApplier:
                 "mathematical_constraints_added": 0
             }
         
-        constraints_added = 0
+        visit = self._visit_sums(x, nodes, (node,), range(vehicle_count))
+        cons = []
         
         # Node must be served by the specified vehicle
-        prob += (
-            lpSum(x[i, node, vehicle] for i in nodes if i != node) == 1
-        ), f"VehicleAssignment_Node_{node}_Vehicle_{vehicle}_{constraint_id}"
-        constraints_added += 1
+        name = f"VehicleAssignment_Node_{node}_Vehicle_{vehicle}_{constraint_id}" if self.debug_names else None
+        cons.append(LpConstraint(visit[node, vehicle], LpConstraintEQ, name, 1))
         
         # Node cannot be served by any other vehicle
-        for k in range(len(nodes)):  # Assuming vehicle_count is related to nodes
+        for k in range(vehicle_count):
             if k != vehicle:
-                prob += (
-                    lpSum(x[i, node, k] for i in nodes if i != node) == 0
-                ), f"VehicleAssignment_Node_{node}_NotVehicle_{k}_{constraint_id}"
-                constraints_added += 1
+                name = f"VehicleAssignment_Node_{node}_NotVehicle_{k}_{constraint_id}" if self.debug_names else None
+                cons.append(LpConstraint(visit[node, k], LpConstraintEQ, name, 0))
         
+        constraints_added = self._stage_constraints(prob, cons)
         print(f"[Enhanced Applier] Applied vehicle assignment: node {node} assigned to vehicle {vehicle}")
         
         return {
@@ -323,48 +387,27 @@ class EnhancedConstraintApplier:
             "details": f"Node {node} assigned to vehicle {vehicle}"
         }
     
-    def _apply_route_constraint(self, prob, constraint: ParsedConstraint, nodes, 
-                              vehicle_count, x, constraint_id: str) -> Dict:
-        """Apply route-level constraints (distance, time limits)"""
-        
-        params = constraint.parameters
-        max_distance = float(params.get("max_distance", float('inf')))
-        
-        # This is a simplified implementation - in practice, you'd need distance matrix
-        constraints_added = 0
-        
-        # For now, we'll add a placeholder constraint
-        # In a real implementation, you'd use the actual distance matrix
-        print(f"[Enhanced Applier] Route constraint noted: max distance {max_distance}")
-        print(f"[Enhanced Applier] Note: Route distance constraints require distance matrix integration")
-        
-        return {
-            "success": True,
-            "constraint_type": "route_constraint",
-            "mathematical_constraints_added": constraints_added,
-            "details": f"Route constraint noted (requires distance matrix): max distance {max_distance}",
-            "warning": "Route constraints require distance matrix integration for full implementation"
-        }
-    
     def _apply_vehicle_count_constraint(self, prob, constraint: ParsedConstraint, 
                                       vehicle_count, used_k, constraint_id: str) -> Dict:
         """Apply vehicle count constraints"""
         
         params = constraint.parameters
-        constraints_added = 0
+        cons = []
         
         if "min_vehicles" in params or "min" in params:
             min_vehicles = int(params.get("min_vehicles", params.get("min", 2)))
-            prob += lpSum(used_k[k] for k in range(vehicle_count)) >= min_vehicles, f"MinVehicles_{constraint_id}"
-            constraints_added += 1
+            name = f"MinVehicles_{constraint_id}" if self.debug_names else None
+            cons.append(LpConstraint(lpSum(used_k[k] for k in range(vehicle_count)), LpConstraintGE, name, min_vehicles))
             print(f"[Enhanced Applier] Applied minimum vehicles constraint: {min_vehicles}")
         
         if "max_vehicles" in params or "max" in params:
             max_vehicles = int(params.get("max_vehicles", params.get("max", vehicle_count)))
-            prob += lpSum(used_k[k] for k in range(vehicle_count)) <= max_vehicles, f"MaxVehicles_{constraint_id}"
-            constraints_added += 1
+            name = f"MaxVehicles_{constraint_id}" if self.debug_names else None
+            cons.append(LpConstraint(lpSum(used_k[k] for k in range(vehicle_count)), LpConstraintLE, name, max_vehicles))
             print(f"[Enhanced Applier] Applied maximum vehicles constraint: {max_vehicles}")
         
+        constraints_added = self._stage_constraints(prob, cons)
+        
         return {
             "success": True,
             "constraint_type": "vehicle_count",
@@ -379,14 +422,15 @@ class EnhancedConstraintApplier:
         
         params = constraint.parameters
         subtype = constraint.subtype
-        constraints_added = 0
         details = []
+        cons = []
+        coupled = None
         
         # Apply vehicle count part
         if "min_vehicles" in params:
             min_vehicles = int(params["min_vehicles"])
-            prob += lpSum(used_k[k] for k in range(vehicle_count)) >= min_vehicles, f"MultiPart_MinVehicles_{constraint_id}"
-            constraints_added += 1
+            name = f"MultiPart_MinVehicles_{constraint_id}" if self.debug_names else None
+            cons.append(LpConstraint(lpSum(used_k[k] for k in range(vehicle_count)), LpConstraintGE, name, min_vehicles))
             details.append(f"Min vehicles: {min_vehicles}")
         
         # Apply node constraint part
@@ -394,75 +438,33 @@ class EnhancedConstraintApplier:
             nodes_list = params["nodes"]
             node_constraint_type = params.get("node_constraint_type", "grouping")
             
+            visit = self._visit_sums(x, nodes, nodes_list[:2], range(vehicle_count))
+            
             if node_constraint_type == "separation":
                 # Apply separation between the nodes
                 for k in range(vehicle_count):
-                    prob += (
-                        lpSum(x[i, nodes_list[0], k] for i in nodes if i != nodes_list[0]) + 
-                        lpSum(x[i, nodes_list[1], k] for i in nodes if i != nodes_list[1])
-                    ) <= 1, f"MultiPart_Separation_{nodes_list[0]}_{nodes_list[1]}_Vehicle_{k}_{constraint_id}"
-                    constraints_added += 1
+                    name = f"MultiPart_Separation_{nodes_list[0]}_{nodes_list[1]}_Vehicle_{k}_{constraint_id}" if self.debug_names else None
+                    cons.append(LpConstraint(visit[nodes_list[0], k] + visit[nodes_list[1], k], LpConstraintLE, name, 1))
                 details.append(f"Separation: nodes {nodes_list[0]} and {nodes_list[1]}")
                 
             elif node_constraint_type == "grouping":
                 # Apply STRONG grouping between the nodes
                 node1, node2 = nodes_list[0], nodes_list[1]
                 
-                # Method 1: Both nodes have same visited status for each vehicle
-                for k in range(vehicle_count):
-                    prob += (
-                        lpSum(x[i, node1, k] for i in nodes if i != node1) == 
-                        lpSum(x[i, node2, k] for i in nodes if i != node2)
-                    ), f"MultiPart_Grouping_Same_{node1}_{node2}_Vehicle_{k}_{constraint_id}"
-                    constraints_added += 1
-                
-                # Method 2: Cross-vehicle exclusion
-                for k in range(vehicle_count):
-                    for other_k in range(vehicle_count):
-                        if k != other_k:
-                            prob += (
-                                lpSum(x[i, node1, k] for i in nodes if i != node1) + 
-                                lpSum(x[i, node2, other_k] for i in nodes if i != node2)
-                            ) <= 1, f"MultiPart_Grouping_Exclusive_{node1}_{node2}_V{k}_V{other_k}_{constraint_id}"
-                            constraints_added += 1
-                
-                # Method 3: Strong coupling with auxiliary variables
-                from pulp import LpVariable, LpBinary
-                
-                both_served_vars = {}
-                for k in range(vehicle_count):
-                    both_served_vars[k] = LpVariable(f"MultiPart_BothServed_{node1}_{node2}_V{k}_{constraint_id}", cat=LpBinary)
-                    
-                    # Force constraints
-                    prob += (
-                        lpSum(x[i, node1, k] for i in nodes if i != node1) >= both_served_vars[k]
-                    ), f"MultiPart_Force1_{node1}_{node2}_V{k}_{constraint_id}"
-                    constraints_added += 1
-                    
-                    prob += (
-                        lpSum(x[i, node2, k] for i in nodes if i != node2) >= both_served_vars[k]
-                    ), f"MultiPart_Force2_{node1}_{node2}_V{k}_{constraint_id}"
-                    constraints_added += 1
-                    
-                    # Trigger constraints
-                    prob += (
-                        both_served_vars[k] >= lpSum(x[i, node1, k] for i in nodes if i != node1)
-                    ), f"MultiPart_Trigger1_{node1}_{node2}_V{k}_{constraint_id}"
-                    constraints_added += 1
-                    
-                    prob += (
-                        both_served_vars[k] >= lpSum(x[i, node2, k] for i in nodes if i != node2)
-                    ), f"MultiPart_Trigger2_{node1}_{node2}_V{k}_{constraint_id}"
-                    constraints_added += 1
-                
-                # Only one vehicle can serve both nodes
-                prob += (
-                    lpSum(both_served_vars[k] for k in range(vehicle_count)) <= 1
-                ), f"MultiPart_OnlyOne_{node1}_{node2}_{constraint_id}"
-                constraints_added += 1
+                # Strong coupling with auxiliary variables; the equality links imply the
+                # per-vehicle equality and cross-vehicle exclusion of the two nodes
+                pair_key = frozenset((node1, node2))
+                if pair_key not in self._both_served_cache:
+                    coupled = {pair_key: self._add_pair_coupling(
+                        cons, visit, node1, node2, vehicle_count, "MultiPart_", constraint_id
+                    )}
                 
                 details.append(f"STRONG grouping: nodes {node1} and {node2}")
         
+        constraints_added = self._stage_constraints(prob, cons)
+        if coupled:
+            self._both_served_cache.update(coupled)
+        
         print(f"[Enhanced Applier] Applied multi-part constraint: {'; '.join(details)}")
         
         return {
@@ -472,27 +474,6 @@ class EnhancedConstraintApplier:
             "details": f"Multi-part constraint: {'; '.join(details)}"
         }
     
-    def _apply_priority_constraint(self, prob, constraint: ParsedConstraint, nodes, 
-                                 vehicle_count, x, constraint_id: str) -> Dict:
-        """Apply priority constraints (service order preferences)"""
-        
-        params = constraint.parameters
-        node = int(params["node"])
-        priority_level = params.get("priority_level", "high")
-        
-        # Priority constraints are typically handled in preprocessing or objective function
-        # For now, we'll just log them
-        print(f"[Enhanced Applier] Priority constraint noted: node {node} has {priority_level} priority")
-        print(f"[Enhanced Applier] Note: Priority constraints typically require preprocessing or objective modification")
-        
-        return {
-            "success": True,
-            "constraint_type": "priority",
-            "mathematical_constraints_added": 0,
-            "details": f"Priority constraint noted for node {node} ({priority_level})",
-            "warning": "Priority constraints require preprocessing or objective function modification"
-        }
-    
     def get_constraint_summary(self) -> Dict:
         """Get summary of applied constraints"""
         summary = {
@@ -4,35 +4,72 @@ Enhanced Constraint Parser for Complex VRP Constraints
 Handles advanced routing constraints like node separation, grouping, and multi-part constraints
 """
 
+import asyncio
+import functools
+import importlib.util
 import json
 import re
 import os
-from typing import Dict, Optional, List, Tuple
-from dataclasses import dataclass
+from typing import Dict, Optional, List, Tuple, Union
+from dataclasses import dataclass, field, replace
+
+# openai (httpx, pydantic) is only imported once the LLM path is actually needed
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+    re2 = None
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    ahocorasick = None
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
 
 try:
-    import openai
-    OPENAI_AVAILABLE = True
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
 except ImportError:
-    OPENAI_AVAILABLE = False
-    openai = None
+    HYPERSCAN_AVAILABLE = False
+    hyperscan = None
 
+try:
+    from .llm_cache import LLMResponseCache, system_prompt_hash
+except ImportError:
+    from llm_cache import LLMResponseCache, system_prompt_hash
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class ConstraintEntity:
     """Represents an entity in a constraint (node, vehicle, route)"""
     type: str  # 'node', 'vehicle', 'route', 'location'
-    id: str    # identifier
+    id: Union[int, str]  # numeric node/vehicle id, or a label such as 'all'
     properties: Dict = None
 
+    @property
+    def sid(self) -> str:
+        """Identifier as a string, for callers that expect text ids"""
+        return str(self.id)
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ParsedConstraint:
     """Enhanced constraint representation"""
     constraint_type: str
     subtype: str = None
     parameters: Dict = None
-    entities: List[ConstraintEntity] = None
+    entities: Tuple[ConstraintEntity, ...] = field(default_factory=tuple)
     mathematical_description: str = ""
     confidence: float = 0.0
     interpretation: str = ""
@@ -41,21 +78,126 @@ class ParsedConstraint:
     requires_preprocessing: bool = False
 
 
+# Shared result for prompts nothing could parse; frozen, so it is safe to hand out repeatedly
+_FALLBACK = ParsedConstraint(
+    constraint_type="custom",
+    subtype="unrecognized",
+    parameters=None,
+    mathematical_description="Custom constraint requiring manual interpretation",
+    confidence=0.3,
+    interpretation="Could not automatically parse. Manual review required.",
+    parsing_method="fallback",
+    complexity_level="unknown",
+    requires_preprocessing=True
+)
+
+# LLM replies sometimes wrap the JSON in a ``` or ```json fence
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*(.*?)\s*```\s*$', re.DOTALL)
+
+def _compile_pattern(pattern: str):
+    """Compile with RE2 when installed (linear-time, no backtracking), else stdlib re"""
+    if RE2_AVAILABLE:
+        return re2.compile(f"(?is){pattern}")
+    return re.compile(pattern, re.DOTALL | re.IGNORECASE)
+
+
+def _verbose(pattern: str) -> str:
+    """Compact a pattern written in verbose layout, where whitespace and # comments are layout only.
+
+    RE2, Hyperscan and the combined scanner all need the compact form, so the layout is
+    removed here rather than compiling with re.VERBOSE. Literal spaces must be written as \\s.
+    """
+    return re.sub(r'\s+|#[^\n]*', '', pattern)
+
+
+def _strip_group_names(pattern: str) -> str:
+    """Turn named groups into plain ones so several patterns can share one combined regex"""
+    return re.sub(r'\(\?P<\w+>', '(', pattern)
+
+
+# Literal words every pattern in a family requires; a prompt containing none of a
+# family's keywords cannot match any of its patterns, so that family's regex is skipped.
+FAMILY_KEYWORDS = {
+    'multi_part_constraints': ('vehicle',),
+    'node_separation': ('together', 'different', 'separate', 'same'),
+    'node_grouping': ('together', 'same', 'group'),
+    'vehicle_assignment': ('vehicle',),
+    'route_constraints': ('route',),
+    'priority_constraints': ('priorit', 'first', 'last', 'early'),
+}
+
+# Subtype reported for each node constraint phrase of a multi-part constraint
+_MULTI_PART_SUBTYPES = {
+    'separation': 'vehicle_count_and_separation',
+    'grouping': 'vehicle_count_and_grouping',
+    'custom': 'vehicle_count_and_custom',
+}
+
+
+# Successful LLM parses keyed by _llm_cache_key. Module level so the cache outlives
+# the parser instances callers create per request.
+_LLM_CACHE = LLMResponseCache()
+
+
+@functools.lru_cache(maxsize=1)
+def _streamlit_api_key() -> Optional[str]:
+    """OpenAI key from streamlit secrets; streamlit is imported and read at most once per process"""
+    try:
+        import streamlit as st
+        if hasattr(st, 'secrets'):
+            if 'openai' in st.secrets and 'api_key' in st.secrets['openai']:
+                return st.secrets['openai']['api_key']
+            elif 'OPENAI_API_KEY' in st.secrets:
+                return st.secrets['OPENAI_API_KEY']
+    except Exception:
+        pass
+        
+    return None
+
+
 class EnhancedConstraintParser:
     """Enhanced parser for complex VRP constraints"""
     
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key or self._get_api_key()
-        self.client = None
-        
-        if OPENAI_AVAILABLE and self.api_key:
-            try:
-                self.client = openai.OpenAI(api_key=self.api_key)
-                print(f"[Enhanced Parser] OpenAI client initialized successfully")
-            except Exception as e:
-                print(f"[Enhanced Parser] Failed to initialize OpenAI client: {e}")
+    def __init__(self, api_key: str = None, cache_path: str = None, keep_raw_prompt: bool = False):
+        # Resolved, and the OpenAI clients created, on first LLM use
+        self.api_key = api_key
+        self._client = None
+        self._aclient = None
+        self._clients_initialized = False
+        # Optional shelve file that persists LLM parses across processes
+        self.cache_path = cache_path
+        # Attach the prompt to fallback results instead of returning the shared one
+        self.keep_raw_prompt = keep_raw_prompt
+        # Pattern matches at or above this confidence skip the LLM call
+        self.pattern_confidence_threshold = 0.7
         
+        self.model = "gpt-4o"
         self.system_prompt = self._create_enhanced_system_prompt()
+        # Part of every LLM cache key, so editing the system prompt invalidates old parses
+        self._prompt_hash = system_prompt_hash(self.system_prompt)
+        
+        # Node constraint phrases of multi-part constraints, classified by one search per category
+        self._separation_re = _compile_pattern(r'not\s+be\s+served\s+together|(?:in|on)\s+different\s+routes')
+        self._grouping_re = _compile_pattern(_verbose(r'''
+            served \s+ together
+          | (?:together|grouped) \s+ (?:in|on) \s+ (?:a\s+|the\s+)? (?:same\s+)? route
+          | (?:in|on) \s+ (?:the\s+)? same \s+ route
+          | (?:covered|handled|managed) \s+ (?:under|by) \s+ (?:the\s+)? same \s+ route
+        '''))
+        
+        # Pieces of the multi-part patterns: the vehicle count, what separates it from the
+        # node pair (an and/also/additionally joiner, or anything for the later phrasings),
+        # the node pair and the phrases that may follow its "should"
+        vehicles_used = r'(?:at\s+least|minimum)\s+(?P<min_v>\d+)\s+vehicles?\s+should\s+be\s+used'
+        use_vehicles = r'(?:use|employ)\s+(?:at\s+least|minimum)\s+(?P<min_v>\d+)\s+vehicles?'
+        joined = r'.*(?:and|also|additionally).*'
+        node_pair = r'node\s+(?P<n1>\d+)\s+and\s+(?:node\s+)?(?P<n2>\d+)\s+should\s+'
+        together_or_apart = _verbose(r'''
+            be \s+ served \s+ together
+          | be \s+ (?:in|on) \s+ (?:the\s+)? same \s+ route
+          | not \s+ be \s+ served \s+ together
+          | be \s+ (?:in|on) \s+ different \s+ routes
+        ''')
         
         # Define constraint patterns for complex routing constraints
         self.constraint_patterns = {
@@ -72,9 +214,9 @@ class EnhancedConstraintParser:
                 r'(?:node|customer)\s+(\d+)\s+(?:and|,)\s+(?:node|customer)\s+(\d+)\s+(?:should\s+)?(?:be\s+served\s+together|be\s+on\s+same\s+route)'
             ],
             'vehicle_assignment': [
-                r'node\s+(\d+)\s+should\s+be\s+served\s+by\s+vehicle\s+(\d+)',
-                r'assign\s+(?:node|customer)\s+(\d+)\s+to\s+vehicle\s+(\d+)',
-                r'vehicle\s+(\d+)\s+(?:must\s+serve|should\s+visit)\s+(?:node|customer)\s+(\d+)'
+                r'node\s+(?P<node>\d+)\s+should\s+be\s+served\s+by\s+vehicle\s+(?P<veh>\d+)',
+                r'assign\s+(?:node|customer)\s+(?P<node>\d+)\s+to\s+vehicle\s+(?P<veh>\d+)',
+                r'vehicle\s+(?P<veh>\d+)\s+(?:must\s+serve|should\s+visit)\s+(?:node|customer)\s+(?P<node>\d+)'
             ],
             'route_constraints': [
                 r'route\s+(\d+)\s+should\s+(?:not\s+)?(?:exceed|be\s+longer\s+than)\s+(\d+(?:\.\d+)?)\s*(\w+)?',
@@ -87,29 +229,72 @@ class EnhancedConstraintParser:
                 r'(?:node|customer)\s+(\d+)\s+should\s+be\s+served\s+(?:first|last|early)'
             ],
             'multi_part_constraints': [
-                r'minimum\s+(\d+)\s+vehicles?\s+should\s+be\s+used.*(?:and|also|additionally).*node\s+(\d+)\s+and\s+node\s+(\d+)\s+should\s+be\s+served\s+together',
-                r'use\s+at\s+least\s+(\d+)\s+vehicles?.*(?:and|also|additionally).*(?:node|customer)\s+(\d+)\s+(?:and|,)\s+(?:node|customer)\s+(\d+)\s+(?:should\s+)?(?:not\s+be\s+served\s+together|be\s+on\s+different\s+routes)',
-                # Enhanced patterns for better matching
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used.*(?:and|also|additionally).*node\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+be\s+(?:served\s+together|(?:in|on)\s+(?:the\s+)?same\s+route)',
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used.*(?:and|also|additionally).*node\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+(?:not\s+be\s+served\s+together|be\s+(?:in|on)\s+different\s+routes)',
-                r'(?:use|employ)\s+(?:at\s+least|minimum)\s+(\d+)\s+vehicles?.*(?:and|also|additionally).*node\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+be\s+(?:served\s+together|(?:in|on)\s+(?:the\s+)?same\s+route)',
-                r'(?:use|employ)\s+(?:at\s+least|minimum)\s+(\d+)\s+vehicles?.*(?:and|also|additionally).*node\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+(?:not\s+be\s+served\s+together|be\s+(?:in|on)\s+different\s+routes)',
-                # Additional patterns for "together in a route" variations
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used.*(?:and|also|additionally).*nodes?\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+be\s+together\s+in\s+a?\s+route',
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used.*(?:and|also|additionally).*node\s+(\d+)\s+and\s+node\s+(\d+)\s+should\s+be\s+together\s+in\s+a?\s+route',
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used.*(?:and|also|additionally).*node\s+(\d+)\s+and\s+node\s+(\d+)\s+should\s+be\s+(?:together|grouped)\s+(?:in|on)\s+(?:a\s+|the\s+)?(?:same\s+)?route',
-                # New patterns for "covered under same route" variations with flexible whitespace
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used[\s\S]*?node\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+be\s+covered\s+under\s+(?:the\s+)?same\s+route',
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used[\s\S]*?node\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+be\s+(?:covered|handled|managed)\s+(?:under|by)\s+(?:the\s+)?same\s+route',
-                # Most flexible pattern that handles line breaks and any whitespace
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used[\s\S]*?node\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+be\s+covered\s+under\s+(?:the\s+)?same\s+route',
-                # NEW PATTERN: "together in same route" (without "a")
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used[\s\S]*?nodes?\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+be\s+together\s+in\s+same\s+route',
-                # Additional flexible patterns for "together in same route"
-                r'(?:at\s+least|minimum)\s+(\d+)\s+vehicles?\s+should\s+be\s+used[\s\S]*?node\s+(\d+)\s+and\s+(?:node\s+)?(\d+)\s+should\s+be\s+together\s+in\s+(?:the\s+)?same\s+route'
+                rf'{vehicles_used}{joined}{node_pair}(?P<phrase>{together_or_apart})',
+                rf'{vehicles_used}{joined}nodes?\s+(?P<n1>\d+)\s+and\s+(?:node\s+)?(?P<n2>\d+)\s+should\s+(?P<phrase>be\s+together\s+in\s+a?\s+route)',
+                rf'{vehicles_used}{joined}node\s+(?P<n1>\d+)\s+and\s+node\s+(?P<n2>\d+)\s+should\s+(?P<phrase>be\s+(?:together|grouped)\s+(?:in|on)\s+(?:a\s+|the\s+)?(?:same\s+)?route)',
+                rf'{vehicles_used}[\s\S]*?{node_pair}(?P<phrase>be\s+(?:covered|handled|managed)\s+(?:under|by)\s+(?:the\s+)?same\s+route|be\s+together\s+in\s+(?:the\s+)?same\s+route)',
+                rf'{vehicles_used}[\s\S]*?nodes?\s+(?P<n1>\d+)\s+and\s+(?:node\s+)?(?P<n2>\d+)\s+should\s+(?P<phrase>be\s+together\s+in\s+same\s+route)',
+                rf'{use_vehicles}{joined}{node_pair}(?P<phrase>{together_or_apart})',
+                rf'use\s+at\s+least\s+(?P<min_v>\d+)\s+vehicles?{joined}(?:node|customer)\s+(?P<n1>\d+)\s+(?:and|,)\s+(?:node|customer)\s+(?P<n2>\d+)\s+(?:should\s+)?(?P<phrase>not\s+be\s+served\s+together|be\s+on\s+different\s+routes)'
             ]
         }
 
+        # A repeated pattern can never match where its first copy failed, so drop repeats
+        for family, patterns in self.constraint_patterns.items():
+            unique_patterns = list(dict.fromkeys(patterns))
+            if len(unique_patterns) != len(patterns):
+                print(f"[Enhanced Parser] Warning: dropped {len(patterns) - len(unique_patterns)} duplicate pattern(s) in '{family}'")
+                self.constraint_patterns[family] = unique_patterns
+        
+        # Compile every pattern once (with RE2 when installed); matching is case-insensitive
+        self.constraint_patterns = {
+            family: [_compile_pattern(pattern) for pattern in patterns]
+            for family, patterns in self.constraint_patterns.items()
+        }
+        # Families in matching order (most complex first) with the parser for each
+        self._family_handlers = [
+            ('multi_part_constraints', self._parse_multi_part_constraint),
+            ('node_separation', self._parse_node_separation),
+            ('node_grouping', self._parse_node_grouping),
+            ('vehicle_assignment', self._parse_vehicle_assignment),
+            ('route_constraints', self._parse_route_constraint),
+            ('priority_constraints', self._parse_priority_constraint),
+        ]
+        self.hyperscan_db = self._build_hyperscan_database()
+        self.keyword_automaton = self._build_keyword_automaton()
+        # Combined regexes keyed by the set of families they cover, built on first use
+        self._scanners: Dict[frozenset, Tuple[re.Pattern, Dict]] = {}
+        # Pattern matching is pure over the prompt, so repeated prompts are served from an LRU cache
+        self._pattern_match_cached = functools.lru_cache(maxsize=4096)(self._pattern_match_constraint)
+        self._priority_node_re = _compile_pattern(r'(?:node|customer)\s+(\d+)')
+        self._priority_level_re = _compile_pattern(r'(high|low|medium|first|last|early)')
+
+    @property
+    def client(self):
+        """Synchronous OpenAI client, or None when the LLM path is unavailable"""
+        if not self._clients_initialized:
+            self._init_clients()
+        return self._client
+
+    @property
+    def aclient(self):
+        """Async OpenAI client, or None when the LLM path is unavailable"""
+        if not self._clients_initialized:
+            self._init_clients()
+        return self._aclient
+
+    def _init_clients(self):
+        self._clients_initialized = True
+        self.api_key = self.api_key or self._get_api_key()
+        if OPENAI_AVAILABLE and self.api_key:
+            try:
+                import openai
+                self._client = openai.OpenAI(api_key=self.api_key)
+                self._aclient = openai.AsyncOpenAI(api_key=self.api_key)
+                print(f"[Enhanced Parser] OpenAI client initialized successfully")
+            except Exception as e:
+                print(f"[Enhanced Parser] Failed to initialize OpenAI client: {e}")
+
     def _get_api_key(self) -> Optional[str]:
         """Get OpenAI API key from various sources"""
         # Try environment variable first
@@ -118,17 +303,7 @@ class EnhancedConstraintParser:
             return api_key
             
         # Try streamlit secrets
-        try:
-            import streamlit as st
-            if hasattr(st, 'secrets'):
-                if 'openai' in st.secrets and 'api_key' in st.secrets['openai']:
-                    return st.secrets['openai']['api_key']
-                elif 'OPENAI_API_KEY' in st.secrets:
-                    return st.secrets['OPENAI_API_KEY']
-        except:
-            pass
-            
-        return None
+        return _streamlit_api_key()
 
     def _create_enhanced_system_prompt(self) -> str:
         return """
@@ -215,19 +390,23 @@ Output: {
 Handle typos, informal language, and ambiguous cases gracefully.
 """
 
-    def parse_constraint(self, prompt: str, context: Dict = None) -> ParsedConstraint:
-        """Parse constraint using enhanced pattern matching and LLM"""
+    def parse_constraint(self, prompt: str, context: Dict = None, prefer_pattern: bool = False) -> ParsedConstraint:
+        """Parse constraint using enhanced pattern matching and LLM.
+
+        With prefer_pattern, any pattern match is returned regardless of its confidence
+        and the LLM is only consulted for prompts no pattern recognizes.
+        """
         print(f"[Enhanced Parser] Parsing constraint: '{prompt}'")
         
         # First try pattern matching for known complex constraints
-        pattern_result = self._pattern_match_constraint(prompt)
-        if pattern_result and pattern_result.confidence > 0.8:
+        pattern_result = self._pattern_match_cached(prompt)
+        if self._accept_pattern_result(pattern_result, prefer_pattern):
             print(f"[Enhanced Parser] High confidence pattern match: {pattern_result.constraint_type}")
             return pattern_result
         
         # If pattern matching fails or has low confidence, use LLM
         if self.client:
-            llm_result = self._llm_parse_constraint(prompt, context)
+            llm_result = self._cached_llm_parse(prompt, context)
             if llm_result:
                 print(f"[Enhanced Parser] LLM parsing successful: {llm_result.constraint_type}")
                 return llm_result
@@ -236,48 +415,156 @@ Handle typos, informal language, and ambiguous cases gracefully.
         print(f"[Enhanced Parser] Using fallback parsing")
         return self._fallback_parse_constraint(prompt)
 
+    async def parse_constraint_async(self, prompt: str, context: Dict = None,
+                                     prefer_pattern: bool = False) -> ParsedConstraint:
+        """Async variant of parse_constraint; only the LLM call is awaited"""
+        pattern_result = self._pattern_match_cached(prompt)
+        if self._accept_pattern_result(pattern_result, prefer_pattern):
+            return pattern_result
+        
+        if self.aclient:
+            llm_result = await self._cached_llm_parse_async(prompt, context)
+            if llm_result:
+                return llm_result
+        
+        return self._fallback_parse_constraint(prompt)
+
+    async def parse_many(self, prompts: List[str], context: Dict = None,
+                         prefer_pattern: bool = True) -> List[ParsedConstraint]:
+        """Parse several constraints, running their LLM calls concurrently"""
+        return await asyncio.gather(*(self.parse_constraint_async(p, context, prefer_pattern) for p in prompts))
+
+    def parse_constraints_batch(self, prompts: List[str], context: Dict = None,
+                                prefer_pattern: bool = True) -> List[ParsedConstraint]:
+        """Blocking wrapper around parse_many for callers without an event loop"""
+        return asyncio.run(self.parse_many(prompts, context, prefer_pattern))
+
+    def _accept_pattern_result(self, pattern_result: Optional[ParsedConstraint], prefer_pattern: bool) -> bool:
+        """Whether a pattern match is good enough to skip the LLM"""
+        if pattern_result is None:
+            return False
+        return prefer_pattern or pattern_result.confidence >= self.pattern_confidence_threshold
+
     def _pattern_match_constraint(self, prompt: str) -> Optional[ParsedConstraint]:
         """Pattern matching for complex constraints"""
-        prompt_lower = prompt.lower().strip()
-        
-        # Check for multi-part constraints first (most complex)
-        for pattern in self.constraint_patterns['multi_part_constraints']:
-            # Use re.DOTALL to make . match newlines
-            match = re.search(pattern, prompt_lower, re.DOTALL)
-            if match:
-                return self._parse_multi_part_constraint(match, prompt)
-        
-        # Check for node separation
-        for pattern in self.constraint_patterns['node_separation']:
-            match = re.search(pattern, prompt_lower, re.DOTALL)
-            if match:
-                return self._parse_node_separation(match, prompt)
-        
-        # Check for node grouping
-        for pattern in self.constraint_patterns['node_grouping']:
-            match = re.search(pattern, prompt_lower, re.DOTALL)
-            if match:
-                return self._parse_node_grouping(match, prompt)
-        
-        # Check for vehicle assignment
-        for pattern in self.constraint_patterns['vehicle_assignment']:
-            match = re.search(pattern, prompt_lower, re.DOTALL)
-            if match:
-                return self._parse_vehicle_assignment(match, prompt)
-        
-        # Check for route constraints
-        for pattern in self.constraint_patterns['route_constraints']:
-            match = re.search(pattern, prompt_lower, re.DOTALL)
-            if match:
-                return self._parse_route_constraint(match, prompt)
-        
-        # Check for priority constraints
-        for pattern in self.constraint_patterns['priority_constraints']:
-            match = re.search(pattern, prompt_lower, re.DOTALL)
-            if match:
-                return self._parse_priority_constraint(match, prompt)
+        # Hyperscan tells in one pass which families can match; otherwise use their keywords
+        # (matched against the lowered prompt; the patterns themselves ignore case)
+        if self.hyperscan_db is not None:
+            families = self._hyperscan_families(prompt)
+        else:
+            families = self._triggered_families(prompt.lower())
+        if not families:
+            return None
         
-        return None
+        # RE2 has no lookahead support, so with RE2 the patterns are tried one by one instead
+        if RE2_AVAILABLE:
+            for family, handler in self._family_handlers:
+                if family not in families:
+                    continue
+                for pattern in self.constraint_patterns[family]:
+                    match = pattern.search(prompt)
+                    if match:
+                        return handler(match, prompt)
+            return None
+        
+        combined, group_handlers = self._get_scanner(families)
+        match = combined.match(prompt)
+        if not match:
+            return None
+        
+        # Re-anchor the winning pattern so parsers keep its own group numbering
+        pattern, handler = group_handlers[match.lastgroup]
+        return handler(pattern.match(prompt, match.start(match.lastgroup)), prompt)
+
+    def _build_keyword_automaton(self):
+        """Build an Aho-Corasick automaton mapping each keyword to the families it triggers"""
+        if not AHOCORASICK_AVAILABLE:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for family, keywords in FAMILY_KEYWORDS.items():
+            for keyword in keywords:
+                automaton.add_word(keyword, automaton.get(keyword, ()) + (family,))
+        automaton.make_automaton()
+        return automaton
+
+    def _triggered_families(self, prompt_lower: str) -> frozenset:
+        """Families whose keywords occur in the prompt (single pass when pyahocorasick is installed)"""
+        if self.keyword_automaton is not None:
+            return frozenset(
+                family
+                for _, families in self.keyword_automaton.iter(prompt_lower)
+                for family in families
+            )
+        return frozenset(
+            family for family, keywords in FAMILY_KEYWORDS.items()
+            if any(keyword in prompt_lower for keyword in keywords)
+        )
+
+    def _get_scanner(self, families: frozenset) -> Tuple[re.Pattern, Dict]:
+        """Return the combined regex for a set of families, compiling it on first use"""
+        scanner = self._scanners.get(families)
+        if scanner is None:
+            scanner = self._scanners[families] = self._combine_patterns(families)
+        return scanner
+
+    def _combine_patterns(self, families: frozenset) -> Tuple[re.Pattern, Dict]:
+        """Fuse the patterns of the given families into one regex with a named group per pattern.
+
+        Each alternative is a lookahead anchored at the start of the prompt, so families
+        and their patterns keep their priority order (multi-part first) wherever in the
+        prompt they match. Returns the compiled regex and a map of group name ->
+        (compiled pattern, family parser).
+        """
+        branches = []
+        group_handlers = {}
+        for family, handler in self._family_handlers:
+            if family not in families:
+                continue
+            for i, pattern in enumerate(self.constraint_patterns[family]):
+                group_name = f"{family}__{i}"
+                branches.append(rf"(?=[\s\S]*?(?P<{group_name}>{_strip_group_names(pattern.pattern)}))")
+                group_handlers[group_name] = (pattern, handler)
+        
+        combined = re.compile(r"\A(?:" + "|".join(branches) + ")", re.DOTALL | re.IGNORECASE)
+        return combined, group_handlers
+
+    def _build_hyperscan_database(self):
+        """Compile every pattern into one Hyperscan database, with the pattern's family position as its id"""
+        if not HYPERSCAN_AVAILABLE:
+            return None
+        
+        expressions = []
+        ids = []
+        for family_id, (family, _) in enumerate(self._family_handlers):
+            for pattern in self.constraint_patterns[family]:
+                # Hyperscan only reports match offsets, so group names are dropped
+                expressions.append(_strip_group_names(pattern.pattern).encode('utf-8'))
+                ids.append(family_id)
+        
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=expressions,
+                ids=ids,
+                elements=len(expressions),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_DOTALL | hyperscan.HS_FLAG_SINGLEMATCH
+                       | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP] * len(expressions)
+            )
+            return db
+        except Exception as e:
+            print(f"[Enhanced Parser] Hyperscan database unavailable, using regex matching: {e}")
+            return None
+
+    def _hyperscan_families(self, prompt: str) -> frozenset:
+        """Scan the prompt once for all patterns and return the families with a match"""
+        matched_ids = set()
+        
+        def on_match(pattern_id, start, end, flags, context):
+            matched_ids.add(pattern_id)
+        
+        self.hyperscan_db.scan(prompt.encode('utf-8'), match_event_handler=on_match)
+        return frozenset(self._family_handlers[family_id][0] for family_id in matched_ids)
 
     def _parse_node_separation(self, match, original_prompt: str) -> ParsedConstraint:
         """Parse node separation constraints"""
@@ -292,10 +579,10 @@ Handle typos, informal language, and ambiguous cases gracefully.
                 "node_2": node2,
                 "separation_type": "different_routes"
             },
-            entities=[
-                ConstraintEntity("node", str(node1)),
-                ConstraintEntity("node", str(node2))
-            ],
+            entities=(
+                ConstraintEntity("node", node1),
+                ConstraintEntity("node", node2)
+            ),
             mathematical_description=f"sum(x[i,{node1},k] for i in nodes) + sum(x[i,{node2},k] for i in nodes) <= 1 for each vehicle k",
             confidence=0.90,
             interpretation=f"Nodes {node1} and {node2} must be served by different vehicles",
@@ -317,10 +604,10 @@ Handle typos, informal language, and ambiguous cases gracefully.
                 "node_2": node2,
                 "grouping_type": "same_route"
             },
-            entities=[
-                ConstraintEntity("node", str(node1)),
-                ConstraintEntity("node", str(node2))
-            ],
+            entities=(
+                ConstraintEntity("node", node1),
+                ConstraintEntity("node", node2)
+            ),
             mathematical_description=f"sum(x[i,{node1},k] for i in nodes) == sum(x[i,{node2},k] for i in nodes) for each vehicle k",
             confidence=0.90,
             interpretation=f"Nodes {node1} and {node2} must be served by the same vehicle",
@@ -331,36 +618,28 @@ Handle typos, informal language, and ambiguous cases gracefully.
 
     def _parse_vehicle_assignment(self, match, original_prompt: str) -> ParsedConstraint:
         """Parse vehicle assignment constraints"""
-        if "node" in original_prompt.lower() and "vehicle" in original_prompt.lower():
-            # Extract node and vehicle numbers
-            node_match = re.search(r'node\s+(\d+)', original_prompt.lower())
-            vehicle_match = re.search(r'vehicle\s+(\d+)', original_prompt.lower())
-            
-            if node_match and vehicle_match:
-                node = int(node_match.group(1))
-                vehicle = int(vehicle_match.group(1))
-                
-                return ParsedConstraint(
-                    constraint_type="vehicle_assignment",
-                    subtype="fixed_assignment",
-                    parameters={
-                        "node": node,
-                        "vehicle": vehicle,
-                        "assignment_type": "mandatory"
-                    },
-                    entities=[
-                        ConstraintEntity("node", str(node)),
-                        ConstraintEntity("vehicle", str(vehicle))
-                    ],
-                    mathematical_description=f"sum(x[i,{node},{vehicle}] for i in nodes) == 1",
-                    confidence=0.85,
-                    interpretation=f"Node {node} must be served by vehicle {vehicle}",
-                    parsing_method="pattern_matching",
-                    complexity_level="simple",
-                    requires_preprocessing=False
-                )
+        node = int(match.group('node'))
+        vehicle = int(match.group('veh'))
         
-        return None
+        return ParsedConstraint(
+            constraint_type="vehicle_assignment",
+            subtype="fixed_assignment",
+            parameters={
+                "node": node,
+                "vehicle": vehicle,
+                "assignment_type": "mandatory"
+            },
+            entities=(
+                ConstraintEntity("node", node),
+                ConstraintEntity("vehicle", vehicle)
+            ),
+            mathematical_description=f"sum(x[i,{node},{vehicle}] for i in nodes) == 1",
+            confidence=0.85,
+            interpretation=f"Node {node} must be served by vehicle {vehicle}",
+            parsing_method="pattern_matching",
+            complexity_level="simple",
+            requires_preprocessing=False
+        )
 
     def _parse_route_constraint(self, match, original_prompt: str) -> ParsedConstraint:
         """Parse route-level constraints"""
@@ -375,9 +654,9 @@ Handle typos, informal language, and ambiguous cases gracefully.
                 "unit": unit,
                 "applies_to": "all_routes"
             },
-            entities=[
-                ConstraintEntity("route", "all")
-            ],
+            entities=(
+                ConstraintEntity("route", "all"),
+            ),
             mathematical_description=f"sum(distance[i,j] * x[i,j,k] for i,j in edges) <= {distance} for each vehicle k",
             confidence=0.85,
             interpretation=f"Each route must not exceed {distance} {unit}",
@@ -388,12 +667,13 @@ Handle typos, informal language, and ambiguous cases gracefully.
 
     def _parse_priority_constraint(self, match, original_prompt: str) -> ParsedConstraint:
         """Parse priority constraints"""
-        node_match = re.search(r'(?:node|customer)\s+(\d+)', original_prompt.lower())
-        priority_match = re.search(r'(high|low|medium|first|last|early)', original_prompt.lower())
+        node_match = self._priority_node_re.search(original_prompt)
+        priority_match = self._priority_level_re.search(original_prompt)
         
         if node_match:
             node = int(node_match.group(1))
-            priority = priority_match.group(1) if priority_match else "high"
+            # The level pattern ignores case; report the level in lower case as before
+            priority = priority_match.group(1).lower() if priority_match else "high"
             
             return ParsedConstraint(
                 constraint_type="priority",
@@ -403,9 +683,9 @@ Handle typos, informal language, and ambiguous cases gracefully.
                     "priority_level": priority,
                     "priority_type": "service_order"
                 },
-                entities=[
-                    ConstraintEntity("node", str(node))
-                ],
+                entities=(
+                    ConstraintEntity("node", node),
+                ),
                 mathematical_description=f"Priority constraint for node {node} with level {priority}",
                 confidence=0.75,
                 interpretation=f"Node {node} has {priority} priority for service",
@@ -418,50 +698,20 @@ Handle typos, informal language, and ambiguous cases gracefully.
 
     def _parse_multi_part_constraint(self, match, original_prompt: str) -> ParsedConstraint:
         """Parse multi-part constraints"""
-        # This is complex - extract multiple constraint components
-        min_vehicles = int(match.group(1))
-        
-        # Extract nodes directly from the regex match groups
-        # The regex patterns capture the node numbers in groups 2 and 3
-        try:
-            node1 = int(match.group(2))
-            node2 = int(match.group(3))
-            nodes = [node1, node2]
-        except (IndexError, ValueError):
-            # Fallback: use findall if regex groups don't work
-            node_matches = re.findall(r'node\s+(\d+)', original_prompt.lower())
-            # For multi-part constraints, we want the nodes mentioned AFTER the vehicle count
-            # Skip any nodes mentioned in the vehicle count part
-            vehicle_part = original_prompt.lower().split('also')[0] if 'also' in original_prompt.lower() else original_prompt.lower().split('and')[0]
-            node_part = original_prompt.lower().replace(vehicle_part, '')
-            node_matches_in_constraint = re.findall(r'node\s+(\d+)', node_part)
-            nodes = [int(n) for n in node_matches_in_constraint]
+        min_vehicles = int(match.group('min_v'))
+        node1 = int(match.group('n1'))
+        node2 = int(match.group('n2'))
+        nodes = [node1, node2]
         
         # Determine the type of node constraint
-        if "not be served together" in original_prompt.lower() or "different routes" in original_prompt.lower() or "be on different" in original_prompt.lower():
-            constraint_subtype = "vehicle_count_and_separation"
+        phrase = match.group('phrase')
+        if self._separation_re.search(phrase):
             node_constraint_type = "separation"
-        elif ("served together" in original_prompt.lower() or 
-              "same route" in original_prompt.lower() or 
-              "in same route" in original_prompt.lower() or 
-              "on same route" in original_prompt.lower() or
-              "be in same" in original_prompt.lower() or
-              "be on same" in original_prompt.lower() or
-              "together in a route" in original_prompt.lower() or
-              "together in route" in original_prompt.lower() or
-              "be together in" in original_prompt.lower() or
-              "grouped in" in original_prompt.lower() or
-              "grouped on" in original_prompt.lower() or
-              "covered under same route" in original_prompt.lower() or
-              "covered under the same route" in original_prompt.lower() or
-              "handled under same route" in original_prompt.lower() or
-              "managed under same route" in original_prompt.lower() or
-              "covered by same route" in original_prompt.lower()):
-            constraint_subtype = "vehicle_count_and_grouping"
+        elif self._grouping_re.search(phrase):
             node_constraint_type = "grouping"
         else:
-            constraint_subtype = "vehicle_count_and_custom"
             node_constraint_type = "custom"
+        constraint_subtype = _MULTI_PART_SUBTYPES[node_constraint_type]
         
         return ParsedConstraint(
             constraint_type="multi_part",
@@ -471,10 +721,11 @@ Handle typos, informal language, and ambiguous cases gracefully.
                 "nodes": nodes,
                 "node_constraint_type": node_constraint_type
             },
-            entities=[
+            entities=(
                 ConstraintEntity("vehicle", "all"),
-                *[ConstraintEntity("node", str(n)) for n in nodes]
-            ],
+                ConstraintEntity("node", node1),
+                ConstraintEntity("node", node2)
+            ),
             mathematical_description=f"sum(used_k for all k) >= {min_vehicles} AND node constraint for nodes {nodes}",
             confidence=0.85,
             interpretation=f"Use at least {min_vehicles} vehicles and apply {node_constraint_type} constraint to nodes {nodes}",
@@ -483,69 +734,107 @@ Handle typos, informal language, and ambiguous cases gracefully.
             requires_preprocessing=True
         )
 
+    def _llm_cache_key(self, prompt: str, context: Dict = None) -> str:
+        """Stable hash of everything that determines the LLM's answer"""
+        return _LLM_CACHE.key(prompt, context, self.model, self._prompt_hash)
+
+    def _cached_llm_parse(self, prompt: str, context: Dict = None) -> Optional[ParsedConstraint]:
+        """LLM parse served from the caches before calling the API"""
+        key = self._llm_cache_key(prompt, context)
+        result = _LLM_CACHE.get(key, self.cache_path)
+        if result is None:
+            result = self._llm_parse_constraint(prompt, context)
+            # Failed calls are not cached so they are retried next time
+            if result is not None:
+                _LLM_CACHE.put(key, result, self.cache_path)
+        return result
+
+    async def _cached_llm_parse_async(self, prompt: str, context: Dict = None) -> Optional[ParsedConstraint]:
+        """Async counterpart of _cached_llm_parse"""
+        key = self._llm_cache_key(prompt, context)
+        result = _LLM_CACHE.get(key, self.cache_path)
+        if result is None:
+            result = await self._llm_parse_constraint_async(prompt, context)
+            if result is not None:
+                _LLM_CACHE.put(key, result, self.cache_path)
+        return result
+
+    def _llm_request(self, prompt: str, context: Dict = None) -> Dict:
+        """Chat completion arguments shared by the sync and async LLM calls"""
+        context_info = ""
+        if context:
+            # Compact JSON: indentation only adds prompt tokens
+            if ORJSON_AVAILABLE:
+                context_json = orjson.dumps(context, option=orjson.OPT_NON_STR_KEYS).decode()
+            else:
+                context_json = json.dumps(context, separators=(',', ':'))
+            context_info = f"\nContext: {context_json}"
+        
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": f"Parse this constraint: '{prompt}'{context_info}"}
+            ],
+            "temperature": 0.1,
+            "max_tokens": 1500
+        }
+
+    def _llm_response_to_constraint(self, response) -> ParsedConstraint:
+        """Convert a chat completion into a ParsedConstraint"""
+        content = response.choices[0].message.content
+        
+        # Extract JSON
+        fence = _FENCE_RE.match(content)
+        payload = fence.group(1) if fence else content
+        result_dict = orjson.loads(payload) if ORJSON_AVAILABLE else json.loads(payload)
+        
+        # Convert to ParsedConstraint object; numeric ids become ints as on the pattern path
+        entities = tuple(
+            ConstraintEntity(entity_type.rstrip('s'), int(entity_id) if str(entity_id).isdigit() else str(entity_id))
+            for entity_type, entity_list in result_dict.get('entities', {}).items()
+            for entity_id in entity_list
+        )
+        
+        return ParsedConstraint(
+            constraint_type=result_dict.get('constraint_type', 'custom'),
+            subtype=result_dict.get('subtype'),
+            parameters=result_dict.get('parameters', {}),
+            entities=entities,
+            mathematical_description=result_dict.get('mathematical_description', ''),
+            confidence=result_dict.get('confidence', 0.8),
+            interpretation=result_dict.get('interpretation', ''),
+            parsing_method="llm",
+            complexity_level=result_dict.get('complexity_level', 'medium'),
+            requires_preprocessing=result_dict.get('requires_preprocessing', False)
+        )
+
     def _llm_parse_constraint(self, prompt: str, context: Dict = None) -> Optional[ParsedConstraint]:
         """Use LLM for complex constraint parsing"""
         try:
-            context_info = ""
-            if context:
-                context_info = f"\nContext: {json.dumps(context, indent=2)}"
-
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": f"Parse this constraint: '{prompt}'{context_info}"}
-                ],
-                temperature=0.1,
-                max_tokens=1500
-            )
-
-            content = response.choices[0].message.content.strip()
-            
-            # Extract JSON
-            if content.startswith('```json'):
-                content = content[7:-3]
-            elif content.startswith('```'):
-                content = content[3:-3]
-                
-            result_dict = json.loads(content)
-            
-            # Convert to ParsedConstraint object
-            entities = []
-            for entity_type, entity_list in result_dict.get('entities', {}).items():
-                for entity_id in entity_list:
-                    entities.append(ConstraintEntity(entity_type.rstrip('s'), str(entity_id)))
-            
-            return ParsedConstraint(
-                constraint_type=result_dict.get('constraint_type', 'custom'),
-                subtype=result_dict.get('subtype'),
-                parameters=result_dict.get('parameters', {}),
-                entities=entities,
-                mathematical_description=result_dict.get('mathematical_description', ''),
-                confidence=result_dict.get('confidence', 0.8),
-                interpretation=result_dict.get('interpretation', ''),
-                parsing_method="llm",
-                complexity_level=result_dict.get('complexity_level', 'medium'),
-                requires_preprocessing=result_dict.get('requires_preprocessing', False)
-            )
+            response = self.client.chat.completions.create(**self._llm_request(prompt, context))
+            return self._llm_response_to_constraint(response)
+        except Exception as e:
+            print(f"[Enhanced Parser] LLM parsing failed: {e}")
+            return None
 
+    async def _llm_parse_constraint_async(self, prompt: str, context: Dict = None) -> Optional[ParsedConstraint]:
+        """Use LLM for complex constraint parsing without blocking the event loop"""
+        try:
+            response = await self.aclient.chat.completions.create(**self._llm_request(prompt, context))
+            return self._llm_response_to_constraint(response)
         except Exception as e:
             print(f"[Enhanced Parser] LLM parsing failed: {e}")
             return None
 
     def _fallback_parse_constraint(self, prompt: str) -> ParsedConstraint:
         """Fallback parsing for unrecognized constraints"""
-        return ParsedConstraint(
-            constraint_type="custom",
-            subtype="unrecognized",
+        if not self.keep_raw_prompt:
+            return _FALLBACK
+        return replace(
+            _FALLBACK,
             parameters={"raw_constraint": prompt},
-            entities=[],
-            mathematical_description="Custom constraint requiring manual interpretation",
-            confidence=0.3,
-            interpretation=f"Could not automatically parse: '{prompt}'. Manual review required.",
-            parsing_method="fallback",
-            complexity_level="unknown",
-            requires_preprocessing=True
+            interpretation=f"Could not automatically parse: '{prompt}'. Manual review required."
         )
 
     def is_available(self) -> bool:
@@ -0,0 +1,47 @@
+# backend/applications/vehicle_routing/kernel_jit.py
+
+"""
+numba compilation with a NumPy fallback, shared by the *_kernels modules.
+
+Kernels are compiled on their first call rather than at import. When numba is not
+installed, or compiling or loading its on-disk cache fails (for instance a cache
+written while the package was imported under another name), the NumPy
+implementation is used from then on.
+"""
+
+import functools
+import logging
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+
+def jit_kernel(loop, fallback):
+    """Callable running njit(loop) once it has compiled, else fallback with the same arguments"""
+    if not NUMBA_AVAILABLE:
+        return fallback
+
+    impl = None
+
+    @functools.wraps(loop)
+    def kernel(*args):
+        nonlocal impl
+        if impl is not None:
+            return impl(*args)
+        try:
+            compiled = njit(cache=True)(loop)
+            result = compiled(*args)
+        except Exception as e:
+            logger.debug("numba kernel %s unavailable, using %s: %s", loop.__name__, fallback.__name__, e)
+            impl = fallback
+            return fallback(*args)
+        impl = compiled
+        return result
+
+    return kernel
@@ -0,0 +1,75 @@
+# backend/applications/vehicle_routing/llm_cache.py
+
+"""
+Cache of LLM constraint parses, shared by LLMConstraintParser and EnhancedConstraintParser.
+
+Parses are kept in a process-wide LRU and, when the parser has a cache_path, in a
+shelve file whose entries expire after a TTL. Keys cover everything that determines
+the LLM's answer, so changing the model or the system prompt invalidates old parses.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import shelve
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def system_prompt_hash(system_prompt: str) -> str:
+    """Short digest of a system prompt, part of every cache key"""
+    return hashlib.blake2b(system_prompt.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class LLMResponseCache:
+    """LRU of LLM parses with an optional shelve file; lookups return a copy of the cached value"""
+
+    def __init__(self, max_size: int = 2048, ttl: float = 30 * 24 * 3600):
+        self.max_size = max_size
+        # Entries in the shelve file older than this are ignored and re-parsed
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+
+    @staticmethod
+    def key(prompt: str, context: Optional[Dict], model: str, prompt_hash: str) -> str:
+        """Stable hash of everything that determines the LLM's answer"""
+        payload = json.dumps([prompt, context, model, prompt_hash], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, cache_path: Optional[str] = None) -> Any:
+        """Look up a parse in the in-process cache, then the shelve file"""
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+        elif cache_path:
+            try:
+                with shelve.open(cache_path) as db:
+                    entry = db.get(key)
+            except Exception as e:
+                logger.warning("Could not read parse cache: %s", e)
+                entry = None
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                result = entry[1]
+                self.put(key, result)
+
+        # Callers annotate the returned value, so never hand out the cached one
+        return copy.deepcopy(result) if result is not None else None
+
+    def put(self, key: str, result: Any, cache_path: Optional[str] = None):
+        """Store a parse in memory, and in the shelve file when cache_path is given"""
+        result = copy.deepcopy(result)
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        if cache_path:
+            try:
+                with shelve.open(cache_path) as db:
+                    db[key] = (time.time(), result)
+            except Exception as e:
+                logger.warning("Could not write parse cache: %s", e)
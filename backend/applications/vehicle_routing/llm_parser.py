@@ -1,8 +1,11 @@
 # backend/applications/vehicle_routing/llm_parser.py
 
+import functools
 import json
+import logging
 import re
 import os
+from collections import defaultdict
 from typing import Dict, Optional, List
 
 try:
@@ -12,74 +15,189 @@ except ImportError:
     OPENAI_AVAILABLE = False
     openai = None
 
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+    hyperscan = None
 
-class LLMConstraintParser:
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key or self._get_api_key()
-        self.client = None
-        
-        # Debug logging
-        print(f"[LLM Debug] OPENAI_AVAILABLE: {OPENAI_AVAILABLE}")
-        print(f"[LLM Debug] API key found: {bool(self.api_key)}")
-        if self.api_key:
-            print(f"[LLM Debug] API key length: {len(self.api_key)}")
-        
-        if OPENAI_AVAILABLE and self.api_key:
-            try:
-                self.client = openai.OpenAI(api_key=self.api_key)
-                print(f"[LLM Debug] OpenAI client initialized successfully")
-            except Exception as e:
-                print(f"[LLM Debug] Failed to initialize OpenAI client: {e}")
-        else:
-            if not OPENAI_AVAILABLE:
-                print(f"[LLM Debug] OpenAI package not available")
-            if not self.api_key:
-                print(f"[LLM Debug] No API key found")
-                
-        self.system_prompt = self._create_system_prompt()
+try:
+    from .llm_cache import LLMResponseCache, system_prompt_hash
+except ImportError:
+    from llm_cache import LLMResponseCache, system_prompt_hash
 
-    def _get_api_key(self) -> Optional[str]:
-        """Get OpenAI API key from various sources"""
-        print(f"[LLM Debug] Checking for API key...")
-        print(f"[LLM Debug] Environment variables available: {list(os.environ.keys())}")
-        
-        # Try environment variable first
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if api_key:
-            print(f"[LLM Debug] Found API key in environment variable (length: {len(api_key)})")
-            return api_key
-        else:
-            print(f"[LLM Debug] No OPENAI_API_KEY in environment variables")
-            
-        # Try streamlit secrets (if available)
-        try:
-            import streamlit as st
-            # Try both formats of the API key in secrets
-            if hasattr(st, 'secrets'):
-                # Try the nested format first
-                if 'openai' in st.secrets and 'api_key' in st.secrets['openai']:
-                    api_key = st.secrets['openai']['api_key']
-                    print(f"[LLM Debug] Found API key in streamlit secrets (openai.api_key)")
-                    return api_key
-                # Try the direct format
-                elif 'OPENAI_API_KEY' in st.secrets:
-                    api_key = st.secrets['OPENAI_API_KEY']
-                    print(f"[LLM Debug] Found API key in streamlit secrets (OPENAI_API_KEY)")
-                    return api_key
-                else:
-                    print(f"[LLM Debug] Available secrets keys: {list(st.secrets.keys())}")
-                    if 'openai' in st.secrets:
-                        print(f"[LLM Debug] Available openai secrets: {list(st.secrets['openai'].keys())}")
-            else:
-                print(f"[LLM Debug] No streamlit secrets available")
-        except Exception as e:
-            print(f"[LLM Debug] Error accessing streamlit secrets: {e}")
-            
-        print(f"[LLM Debug] No API key found in any source")
+logger = logging.getLogger(__name__)
+
+# Fallback patterns, compiled once at import. They match case-insensitively, so
+# the prompt never needs lower-casing.
+_VEHICLE_COUNT_RES = [(re.compile(p, re.IGNORECASE), subtype) for p, subtype in (
+    (r'm(?:in|im)(?:imum)?\s+(\d+)\s+vehicles?\s+should\s+be\s+used', 'min_vehicles'),
+    (r'need\s+(?:at\s+least\s+)?(\d+)\s+vehicles?', 'min_vehicles'),
+    (r'use\s+at\s+least\s+(\d+)\s+vehicles?', 'min_vehicles'),
+    (r'max(?:imum)?\s+(\d+)\s+vehicles?\s+should\s+be\s+used', 'max_vehicles'),
+    (r'use\s+(?:at\s+most\s+)?(\d+)\s+vehicles?', 'max_vehicles'),
+)]
+
+# Generic vehicle reduction patterns (for vague constraints)
+_VEHICLE_REDUCTION_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r'use\s+fewer\s+vehicles?(?:\s+only)?',
+    r'use\s+least\s+(?:number\s+of\s+)?vehicles?',
+    r'use\s+(?:the\s+)?minimum\s+(?:number\s+of\s+)?vehicles?',
+    r'reduce\s+(?:the\s+)?(?:number\s+of\s+)?vehicles?',
+    r'minimize\s+(?:the\s+)?(?:number\s+of\s+)?vehicles?',
+    r'less\s+vehicles?',
+    r'minimum\s+vehicles?(?:\s+only)?',
+    r'fewest\s+vehicles?',
+)]
+
+_CAPACITY_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r'at\s+max(?:imum)?\s+(\d+(?:\.\d+)?)\s*(\w+)?\s+capacity\s+should\s+be\s+used',
+    r'vehicle\s+capacity\s+(?:should\s+)?(?:not\s+)?(?:exceed|be\s+(?:less\s+than|under|below|at\s+most))\s+(\d+(?:\.\d+)?)\s*(\w+)?',
+    r'(?:each\s+)?vehicle\s+can\s+carry\s+(?:at\s+most\s+|maximum\s+)?(\d+(?:\.\d+)?)\s*(\w+)?',
+)]
+
+# Result fields per vehicle count subtype: parameter key (also the direction),
+# mathematical description and interpretation, formatted with the matched count
+_VEHICLE_COUNT_TEMPLATES = {
+    'min_vehicles': ('min', "sum(vehicle_used_k for all k) >= {count}", "At least {count} vehicles must be used"),
+    'max_vehicles': ('max', "sum(vehicle_used_k for all k) <= {count}", "At most {count} vehicles must be used"),
+}
+
+# Every fallback rule in priority order: reduction first, then explicit counts, then capacity
+_FALLBACK_RULES = (
+    [(cre, 'reduction') for cre in _VEHICLE_REDUCTION_RES]
+    + _VEHICLE_COUNT_RES
+    + [(cre, 'capacity') for cre in _CAPACITY_RES]
+)
+
+
+def _build_fallback_hyperscan_database():
+    """Compile the fallback rules into one Hyperscan database, with the rule's priority as its id"""
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[cre.pattern.encode('utf-8') for cre, _ in _FALLBACK_RULES],
+            ids=list(range(len(_FALLBACK_RULES))),
+            elements=len(_FALLBACK_RULES),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+                   | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP] * len(_FALLBACK_RULES)
+        )
+        return db
+    except Exception as e:
+        logger.warning("Hyperscan database unavailable, using regex matching: %s", e)
         return None
 
-    def _create_system_prompt(self) -> str:
-        return """
+
+_FALLBACK_HS_DB = _build_fallback_hyperscan_database()
+
+
+def _match_fallback_rule(prompt: str):
+    """Find the highest-priority fallback rule matching the prompt.
+
+    With Hyperscan all rules are scanned in a single pass and only the winner is re-run
+    for its groups. Returns (match, kind), or (None, None) when no rule matches.
+    """
+    if _FALLBACK_HS_DB is not None:
+        matched_ids = set()
+        
+        def on_match(rule_id, start, end, flags, context):
+            matched_ids.add(rule_id)
+        
+        _FALLBACK_HS_DB.scan(prompt.encode('utf-8'), match_event_handler=on_match)
+        if not matched_ids:
+            return None, None
+        cre, kind = _FALLBACK_RULES[min(matched_ids)]
+        return cre.search(prompt), kind
+    
+    # Python's re searches a single pattern for its literal prefix, which beats a fused
+    # alternation here, so without Hyperscan the rules are tried in priority order
+    for cre, kind in _FALLBACK_RULES:
+        match = cre.search(prompt)
+        if match:
+            return match, kind
+    return None, None
+
+
+# Structured-output schema for a single parsed constraint. Not strict: strict mode would
+# require every parameter key to be declared, and parameters differ per constraint type.
+_CONSTRAINT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "vrp_constraint",
+        "strict": False,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "constraint_type": {
+                    "type": "string",
+                    "enum": ["capacity", "time_window", "distance", "working_hours",
+                             "vehicle_restriction", "priority", "vehicle_count", "custom"]
+                },
+                "parameters": {"type": "object"},
+                "entities": {
+                    "type": "object",
+                    "properties": {
+                        "vehicles": {"type": "array", "items": {"type": "string"}},
+                        "customers": {"type": "array", "items": {"type": "string"}},
+                        "locations": {"type": "array", "items": {"type": "string"}}
+                    }
+                },
+                "mathematical_description": {"type": "string"},
+                "confidence": {"type": "number"},
+                "interpretation": {"type": "string"}
+            },
+            "required": ["constraint_type", "parameters", "entities", "mathematical_description",
+                         "confidence", "interpretation"]
+        }
+    }
+}
+
+
+def _read_json_stream(stream) -> str:
+    """Collect a streamed completion until its top-level JSON object closes.
+
+    Braces are counted outside string literals, so the object is returned as soon as its
+    closing brace arrives and any trailing tokens are never waited for.
+    """
+    buffer = []
+    depth = 0
+    in_string = False
+    escaped = False
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if not text:
+            continue
+        for i, char in enumerate(text):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    buffer.append(text[:i + 1])
+                    stream.close()
+                    content = ''.join(buffer)
+                    return content[content.index('{'):]
+        buffer.append(text)
+    return ''.join(buffer)
+
+
+# Built once; identical on every call so the server-side prompt cache applies
+_SYSTEM_PROMPT = """
 You are a constraint parser for Vehicle Routing Problems (VRP). Your task is to parse natural language constraints and convert them into structured format.
 
 Given a natural language constraint, extract:
@@ -145,45 +263,145 @@ Be precise and handle ambiguous cases by asking for clarification in the interpr
 Handle typos and informal language gracefully.
 """
 
+
+@functools.lru_cache(maxsize=1)
+def _streamlit_api_key() -> Optional[str]:
+    """OpenAI key from streamlit secrets; streamlit is imported and read at most once per process"""
+    try:
+        import streamlit as st
+        # Try both formats of the API key in secrets
+        if hasattr(st, 'secrets'):
+            # Try the nested format first
+            if 'openai' in st.secrets and 'api_key' in st.secrets['openai']:
+                api_key = st.secrets['openai']['api_key']
+                logger.debug("Found API key in streamlit secrets (openai.api_key)")
+                return api_key
+            # Try the direct format
+            elif 'OPENAI_API_KEY' in st.secrets:
+                api_key = st.secrets['OPENAI_API_KEY']
+                logger.debug("Found API key in streamlit secrets (OPENAI_API_KEY)")
+                return api_key
+            else:
+                logger.debug("Available secrets keys: %s", list(st.secrets.keys()))
+                if 'openai' in st.secrets:
+                    logger.debug("Available openai secrets: %s", list(st.secrets['openai'].keys()))
+        else:
+            logger.debug("No streamlit secrets available")
+    except Exception as e:
+        logger.debug("Error accessing streamlit secrets: %s", e)
+
+    return None
+
+
+# Most constraints sent to the LLM in one batch call
+_BATCH_SIZE = 10
+
+# LLM parses shared by every parser in the process, keyed by _response_cache_key
+_RESPONSE_CACHE = LLMResponseCache()
+
+
+class LLMConstraintParser:
+    def __init__(self, api_key: str = None, cache_path: str = None):
+        self.api_key = api_key or self._get_api_key()
+        self.client = None
+        self.model = "gpt-4o"
+        # Optional shelve file that persists LLM parses across processes
+        self.cache_path = cache_path
+        
+        logger.debug("OPENAI_AVAILABLE: %s, API key found: %s", OPENAI_AVAILABLE, bool(self.api_key))
+        
+        if OPENAI_AVAILABLE and self.api_key:
+            try:
+                # The SDK retries rate limits, timeouts, connection errors and 5xx with
+                # exponential backoff and jitter; anything else fails fast to the fallback
+                self.client = openai.OpenAI(api_key=self.api_key, max_retries=3, timeout=10.0)
+                logger.debug("OpenAI client initialized successfully")
+            except Exception as e:
+                logger.warning("Failed to initialize OpenAI client: %s", e)
+        else:
+            if not OPENAI_AVAILABLE:
+                logger.debug("OpenAI package not available")
+            if not self.api_key:
+                logger.debug("No API key found")
+                
+        self.system_prompt = self._create_system_prompt()
+        # Part of every cache key, so editing the system prompt invalidates old parses
+        self._prompt_hash = system_prompt_hash(self.system_prompt)
+        # OpenAI prompt-cache routing key; changes whenever the system prompt does
+        self._prompt_cache_key = f"vrp_parser_{self._prompt_hash}"
+        # Fallback pattern matches at or above this confidence skip the LLM call
+        self.fallback_confidence_threshold = 0.85
+
+    def _get_api_key(self) -> Optional[str]:
+        """Get OpenAI API key from various sources"""
+        # Try environment variable first
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if api_key:
+            logger.debug("Found API key in environment variable")
+            return api_key
+        else:
+            logger.debug("No OPENAI_API_KEY in environment variables")
+            
+        # Try streamlit secrets (if available)
+        api_key = _streamlit_api_key()
+        if api_key:
+            return api_key
+            
+        logger.debug("No API key found in any source")
+        return None
+
+    def _create_system_prompt(self) -> str:
+        return _SYSTEM_PROMPT
+
     def parse_constraint(self, prompt: str, context: Dict = None) -> Optional[Dict]:
         """Parse constraint using LLM when pattern matching fails"""
-        print(f"[LLM Debug] Starting constraint parsing for: '{prompt}'")
+        logger.debug("Starting constraint parsing for: %r", prompt)
+
+        # The canned patterns answer in microseconds; only ask the LLM when they cannot
+        confident_result = self._confident_fallback_parse(prompt)
+        if confident_result is not None:
+            logger.debug("Confident pattern match, skipping LLM. Type: %s", confident_result['constraint_type'])
+            return confident_result
 
         if not OPENAI_AVAILABLE:
-            print("[LLM Debug] OpenAI package not available, using fallback parsing")
+            logger.debug("OpenAI package not available, using fallback parsing")
             return self._fallback_parse(prompt)
 
         if not self.client:
-            print("[LLM Debug] OpenAI client not initialized (missing API key), using fallback parsing")
+            logger.debug("OpenAI client not initialized (missing API key), using fallback parsing")
             return self._fallback_parse(prompt)
 
+        cache_key = self._response_cache_key(prompt, context)
+        cached = _RESPONSE_CACHE.get(cache_key, self.cache_path)
+        if cached is not None:
+            logger.debug("Using cached LLM parse")
+            return cached
+
         try:
-            print("[LLM Debug] Attempting LLM parsing...")
+            logger.debug("Attempting LLM parsing...")
             # Prepare context information
             context_info = ""
             if context:
                 context_info = f"\nContext: {json.dumps(context, indent=2)}"
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            stream = self.client.chat.completions.create(
+                model=self.model,
                 messages=[
                     {"role": "system", "content": self.system_prompt},
                     {"role": "user", "content": f"Parse this constraint: '{prompt}'{context_info}"}
                 ],
                 temperature=0.1,
-                max_tokens=1000
+                max_tokens=1000,
+                # Routes every call to the same server-side prompt cache for the shared system prefix
+                extra_body={"prompt_cache_key": self._prompt_cache_key},
+                response_format=_CONSTRAINT_RESPONSE_FORMAT,
+                stream=True
             )
 
-            # Parse the JSON response
-            content = response.choices[0].message.content.strip()
-            print(f"[LLM Debug] Raw OpenAI response: {content}")
+            # Structured output is a bare object; stop reading as soon as it is complete
+            content = _read_json_stream(stream)
+            logger.debug("Raw OpenAI response: %s", content)
             
-            # Try to extract JSON if it's wrapped in code blocks
-            if content.startswith('```json'):
-                content = content[7:-3]
-            elif content.startswith('```'):
-                content = content[3:-3]
-                
             result = json.loads(content)
             result['parsing_method'] = 'llm'
             
@@ -191,16 +409,101 @@ Handle typos and informal language gracefully.
             if 'confidence' not in result:
                 result['confidence'] = 0.8
                 
-            print(f"[LLM Debug] LLM parsing successful! Type: {result.get('constraint_type')}")
+            logger.debug("LLM parsing successful! Type: %s", result.get('constraint_type'))
+            # Only successful LLM parses are cached; failures are retried next time
+            _RESPONSE_CACHE.put(cache_key, result, self.cache_path)
             return result
 
         except Exception as e:
-            print(f"[LLM Debug] LLM parsing failed: {e}")
+            logger.warning("LLM parsing failed, using fallback parsing: %s", e)
             return self._fallback_parse(prompt)
 
+    def parse_constraints_batch(self, prompts: List[str], context: Dict = None) -> List[Optional[Dict]]:
+        """Parse several constraints with one API call per batch, reusing cached parses.
+
+        Results are in prompt order. Constraints a batch call cannot parse go through
+        parse_constraint one by one.
+        """
+        if not OPENAI_AVAILABLE or not self.client:
+            return [self.parse_constraint(prompt, context) for prompt in prompts]
+        
+        cache_keys = [self._response_cache_key(prompt, context) for prompt in prompts]
+        results = [
+            self._confident_fallback_parse(prompt) or _RESPONSE_CACHE.get(key, self.cache_path)
+            for prompt, key in zip(prompts, cache_keys)
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        
+        for start in range(0, len(pending), _BATCH_SIZE):
+            batch = pending[start:start + _BATCH_SIZE]
+            parsed = self._llm_parse_batch([prompts[i] for i in batch], context) or [None] * len(batch)
+            for i, result in zip(batch, parsed):
+                if result is None:
+                    results[i] = self.parse_constraint(prompts[i], context)
+                else:
+                    _RESPONSE_CACHE.put(cache_keys[i], result, self.cache_path)
+                    results[i] = result
+        
+        return results
+
+    def _llm_parse_batch(self, prompts: List[str], context: Dict = None) -> Optional[List[Dict]]:
+        """One API call for a numbered list of constraints; None if the reply is unusable"""
+        logger.debug("Attempting batch LLM parsing of %d constraints...", len(prompts))
+        context_info = ""
+        if context:
+            context_info = f"\nContext: {json.dumps(context, indent=2)}"
+        numbered = "\n".join(f"[{i}] {prompt}" for i, prompt in enumerate(prompts))
+        
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": (
+                        'Parse each of these constraints. Respond with a JSON object {"results": [...]} '
+                        f"holding one parsed constraint per entry, in the same order:\n{numbered}{context_info}"
+                    )}
+                ],
+                temperature=0.1,
+                max_tokens=1000 * len(prompts),
+                # A batch reply is read in one piece, so allow time for every constraint
+                timeout=10.0 * len(prompts),
+                extra_body={"prompt_cache_key": self._prompt_cache_key},
+                response_format={"type": "json_object"}
+            )
+            results = json.loads(response.choices[0].message.content)['results']
+        except Exception as e:
+            logger.warning("Batch LLM parsing failed: %s", e)
+            return None
+        
+        if not isinstance(results, list) or len(results) != len(prompts):
+            logger.warning("Batch LLM parsing did not return one result per constraint")
+            return None
+        
+        parsed = []
+        for result in results:
+            if not isinstance(result, dict) or 'constraint_type' not in result:
+                parsed.append(None)
+                continue
+            result['parsing_method'] = 'llm'
+            result.setdefault('confidence', 0.8)
+            parsed.append(result)
+        return parsed
+
+    def _response_cache_key(self, prompt: str, context: Dict = None) -> str:
+        """Stable hash of everything that determines the LLM's answer"""
+        return _RESPONSE_CACHE.key(prompt, context, self.model, self._prompt_hash)
+
+    def _confident_fallback_parse(self, prompt: str) -> Optional[Dict]:
+        """Fallback pattern result if it is specific and confident enough to skip the LLM"""
+        result = self._basic_fallback_parsing(prompt)
+        if result['constraint_type'] != 'custom' and result['confidence'] >= self.fallback_confidence_threshold:
+            return result
+        return None
+
     def _fallback_parse(self, prompt: str) -> Dict:
         """Simple fallback parsing when LLM is not available"""
-        print(f"[LLM Debug] Using fallback parsing for: '{prompt}'")
+        logger.debug("Using fallback parsing for: %r", prompt)
         
         # Try some basic pattern matching for common cases
         fallback_result = self._basic_fallback_parsing(prompt)
@@ -227,98 +530,66 @@ Handle typos and informal language gracefully.
 
     def _basic_fallback_parsing(self, prompt: str) -> Dict:
         """Basic fallback parsing for common patterns"""
-        prompt_lower = prompt.lower()
-        
-        # Vehicle count patterns
-        vehicle_count_patterns = [
-            (r'm(?:in|im)(?:imum)?\s+(\d+)\s+vehicles?\s+should\s+be\s+used', 'min_vehicles'),
-            (r'need\s+(?:at\s+least\s+)?(\d+)\s+vehicles?', 'min_vehicles'),
-            (r'use\s+at\s+least\s+(\d+)\s+vehicles?', 'min_vehicles'),
-            (r'max(?:imum)?\s+(\d+)\s+vehicles?\s+should\s+be\s+used', 'max_vehicles'),
-            (r'use\s+(?:at\s+most\s+)?(\d+)\s+vehicles?', 'max_vehicles')
-        ]
-        
-        # Generic vehicle reduction patterns (for vague constraints)
-        vehicle_reduction_patterns = [
-            r'use\s+fewer\s+vehicles?(?:\s+only)?',
-            r'use\s+least\s+(?:number\s+of\s+)?vehicles?',
-            r'use\s+(?:the\s+)?minimum\s+(?:number\s+of\s+)?vehicles?',
-            r'reduce\s+(?:the\s+)?(?:number\s+of\s+)?vehicles?',
-            r'minimize\s+(?:the\s+)?(?:number\s+of\s+)?vehicles?',
-            r'less\s+vehicles?',
-            r'minimum\s+vehicles?(?:\s+only)?',
-            r'fewest\s+vehicles?'
-        ]
-        
-        for pattern in vehicle_reduction_patterns:
-            if re.search(pattern, prompt_lower):
-                return {
-                    "constraint_type": "vehicle_count",
-                    "parameters": {
-                        "constraint_direction": "minimize",
-                        "objective": "reduce_vehicle_count"
-                    },
-                    "entities": {
-                        "vehicles": ["all"],
-                        "customers": [],
-                        "locations": []
-                    },
-                    "mathematical_description": "minimize sum(vehicle_used_k for all k)",
-                    "confidence": 0.75,
-                    "interpretation": "Minimize the number of vehicles used in the solution",
-                    "parsing_method": "fallback_pattern"
-                }
-        
-        for pattern, constraint_subtype in vehicle_count_patterns:
-            match = re.search(pattern, prompt_lower)
-            if match:
-                count = int(match.group(1))
-                return {
-                    "constraint_type": "vehicle_count",
-                    "parameters": {
-                        constraint_subtype.replace('_vehicles', ''): count,
-                        "constraint_direction": constraint_subtype.split('_')[0]
-                    },
-                    "entities": {
-                        "vehicles": ["all"],
-                        "customers": [],
-                        "locations": []
-                    },
-                    "mathematical_description": f"sum(vehicle_used_k for all k) {'>==' if 'min' in constraint_subtype else '<='} {count}",
-                    "confidence": 0.85,
-                    "interpretation": f"{'At least' if 'min' in constraint_subtype else 'At most'} {count} vehicles must be used",
-                    "parsing_method": "fallback_pattern"
-                }
-        
-        # Capacity patterns
-        capacity_patterns = [
-            r'at\s+max(?:imum)?\s+(\d+(?:\.\d+)?)\s*(\w+)?\s+capacity\s+should\s+be\s+used',
-            r'vehicle\s+capacity\s+(?:should\s+)?(?:not\s+)?(?:exceed|be\s+(?:less\s+than|under|below|at\s+most))\s+(\d+(?:\.\d+)?)\s*(\w+)?',
-            r'(?:each\s+)?vehicle\s+can\s+carry\s+(?:at\s+most\s+|maximum\s+)?(\d+(?:\.\d+)?)\s*(\w+)?'
-        ]
-        
-        for pattern in capacity_patterns:
-            match = re.search(pattern, prompt_lower)
-            if match:
-                capacity = float(match.group(1))
-                unit = match.group(2) if len(match.groups()) > 1 and match.group(2) else "units"
-                return {
-                    "constraint_type": "capacity",
-                    "parameters": {
-                        "max_capacity": capacity,
-                        "unit": unit,
-                        "applies_to": "all_vehicles"
-                    },
-                    "entities": {
-                        "vehicles": ["all"],
-                        "customers": [],
-                        "locations": []
-                    },
-                    "mathematical_description": f"sum(demand_j * x_ij) <= {capacity} for each vehicle i",
-                    "confidence": 0.85,
-                    "interpretation": f"Each vehicle can carry at most {capacity} {unit}",
-                    "parsing_method": "fallback_pattern"
-                }
+        match, kind = _match_fallback_rule(prompt)
+        
+        if kind == 'reduction':
+            return {
+                "constraint_type": "vehicle_count",
+                "parameters": {
+                    "constraint_direction": "minimize",
+                    "objective": "reduce_vehicle_count"
+                },
+                "entities": {
+                    "vehicles": ["all"],
+                    "customers": [],
+                    "locations": []
+                },
+                "mathematical_description": "minimize sum(vehicle_used_k for all k)",
+                "confidence": 0.75,
+                "interpretation": "Minimize the number of vehicles used in the solution",
+                "parsing_method": "fallback_pattern"
+            }
+        
+        if kind in _VEHICLE_COUNT_TEMPLATES:
+            direction, description, interpretation = _VEHICLE_COUNT_TEMPLATES[kind]
+            count = int(match.group(1))
+            return {
+                "constraint_type": "vehicle_count",
+                "parameters": {
+                    direction: count,
+                    "constraint_direction": direction
+                },
+                "entities": {
+                    "vehicles": ["all"],
+                    "customers": [],
+                    "locations": []
+                },
+                "mathematical_description": description.format(count=count),
+                "confidence": 0.85,
+                "interpretation": interpretation.format(count=count),
+                "parsing_method": "fallback_pattern"
+            }
+        
+        if kind == 'capacity':
+            capacity = float(match.group(1))
+            unit = match.group(2).lower() if match.group(2) else "units"
+            return {
+                "constraint_type": "capacity",
+                "parameters": {
+                    "max_capacity": capacity,
+                    "unit": unit,
+                    "applies_to": "all_vehicles"
+                },
+                "entities": {
+                    "vehicles": ["all"],
+                    "customers": [],
+                    "locations": []
+                },
+                "mathematical_description": f"sum(demand_j * x_ij) <= {capacity} for each vehicle i",
+                "confidence": 0.85,
+                "interpretation": f"Each vehicle can carry at most {capacity} {unit}",
+                "parsing_method": "fallback_pattern"
+            }
         
         # If no patterns match, return custom
         return {
@@ -341,6 +612,14 @@ class ConstraintValidator:
     
     def __init__(self, problem_context: Dict = None):
         self.problem_context = problem_context or {}
+        # Per-type validators; other constraint types pass without checks
+        self._validators = {
+            'capacity': self._validate_capacity_constraint,
+            'vehicle_count': self._validate_vehicle_count_constraint,
+            'time_window': self._validate_time_window_constraint,
+            'distance': self._validate_distance_constraint,
+            'custom': self._validate_custom_constraint,
+        }
         
     def validate_constraint(self, constraint: Dict) -> Dict:
         """
@@ -352,23 +631,14 @@ class ConstraintValidator:
             "warnings": [],
             "errors": [],
             "suggestions": [],
-            "modified_constraint": constraint.copy()
+            # Only set by a validator that actually changes the constraint
+            "modified_constraint": None
         }
         
-        constraint_type = constraint.get('constraint_type', 'unknown')
-        parameters = constraint.get('parameters', {})
-        
         # Validate based on constraint type
-        if constraint_type == 'capacity':
-            validation_result = self._validate_capacity_constraint(constraint, validation_result)
-        elif constraint_type == 'vehicle_count':
-            validation_result = self._validate_vehicle_count_constraint(constraint, validation_result)
-        elif constraint_type == 'time_window':
-            validation_result = self._validate_time_window_constraint(constraint, validation_result)
-        elif constraint_type == 'distance':
-            validation_result = self._validate_distance_constraint(constraint, validation_result)
-        elif constraint_type == 'custom':
-            validation_result["warnings"].append("Custom constraints require manual review")
+        validator = self._validators.get(constraint.get('constraint_type', 'unknown'))
+        if validator:
+            validation_result = validator(constraint, validation_result)
             
         return validation_result
     
@@ -439,6 +709,11 @@ class ConstraintValidator:
         
         return result
     
+    def _validate_custom_constraint(self, constraint: Dict, result: Dict) -> Dict:
+        """Custom constraints cannot be checked automatically"""
+        result["warnings"].append("Custom constraints require manual review")
+        return result
+    
     def validate_constraint_set(self, constraints: List[Dict]) -> Dict:
         """Validate a set of constraints for conflicts"""
         overall_result = {
@@ -449,8 +724,10 @@ class ConstraintValidator:
             "individual_results": []
         }
         
-        # Validate each constraint individually
+        # Validate each constraint individually, grouping them by type for the conflict checks
+        by_type = defaultdict(list)
         for i, constraint in enumerate(constraints):
+            by_type[constraint.get('constraint_type')].append(constraint)
             individual_result = self.validate_constraint(constraint)
             individual_result["constraint_index"] = i
             overall_result["individual_results"].append(individual_result)
@@ -463,15 +740,15 @@ class ConstraintValidator:
             overall_result["suggestions"].extend(individual_result["suggestions"])
         
         # Check for conflicts between constraints
-        overall_result = self._check_constraint_conflicts(constraints, overall_result)
+        overall_result = self._check_constraint_conflicts(by_type, overall_result)
         
         return overall_result
     
-    def _check_constraint_conflicts(self, constraints: List[Dict], result: Dict) -> Dict:
-        """Check for conflicts between multiple constraints"""
+    def _check_constraint_conflicts(self, by_type: Dict[str, List[Dict]], result: Dict) -> Dict:
+        """Check for conflicts between multiple constraints, given them grouped by constraint type"""
         # Example: conflicting capacity requirements, impossible vehicle counts, etc.
-        capacity_constraints = [c for c in constraints if c.get('constraint_type') == 'capacity']
-        vehicle_count_constraints = [c for c in constraints if c.get('constraint_type') == 'vehicle_count']
+        capacity_constraints = by_type.get('capacity', [])
+        vehicle_count_constraints = by_type.get('vehicle_count', [])
         
         # Check capacity conflicts
         if len(capacity_constraints) > 1:
@@ -1,13 +1,47 @@
 # backend/applications/vehicle_routing/models.py
 
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, Boolean, Text, ForeignKey
+from sqlalchemy import (
+    Column, Integer, String, DateTime, JSON, Float, Boolean, Text, LargeBinary, ForeignKey, Index, select, insert, func
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship, selectinload, validates
 from datetime import datetime
 import json
 
+import numpy as np
+
 Base = declarative_base()
 
+# JSON payload columns: binary JSONB on PostgreSQL, plain JSON on every other database
+_JSONB = JSON().with_variant(JSONB(), 'postgresql')
+
+
+def _select_dicts(session, columns, *criteria) -> list:
+    """Rows of the given columns as plain dicts, read straight from the cursor without building ORM instances.
+
+    Datetimes are converted to ISO strings, as in the models' to_dict().
+    """
+    rows = [dict(row) for row in session.execute(select(*columns).where(*criteria).order_by(columns[0])).mappings()]
+
+    # Only the timestamp columns need converting, so skip type checks on every other value
+    datetime_keys = [column.key for column in columns if isinstance(column.type, DateTime)]
+    for row in rows:
+        for key in datetime_keys:
+            if row[key] is not None:
+                row[key] = row[key].isoformat()
+    return rows
+
+
+class _ProblemChildRows:
+    """list_dicts() for models that belong to a VRPProblem"""
+
+    @classmethod
+    def list_dicts(cls, session, problem_id: int = None) -> list:
+        """to_dict() of every row (or every row of one problem) in a single query"""
+        criteria = [cls.problem_id == problem_id] if problem_id is not None else []
+        return _select_dicts(session, [getattr(cls, name) for name in cls._dict_fields], *criteria)
+
 
 class VRPProblem(Base):
     """Main VRP problem instance"""
@@ -21,24 +55,94 @@ class VRPProblem(Base):
     num_vehicles = Column(Integer, nullable=False, default=1)
     depot_location = Column(String(255))
 
-    # Problem data (JSON format)
-    distance_matrix = Column(JSON)  # Distance matrix between locations
-    customer_data = Column(JSON)  # Customer locations, demands, time windows
-    vehicle_data = Column(JSON)  # Vehicle capacities, costs, constraints
+    # Problem data (JSON format). Deferred and loaded on first access: the distance matrix
+    # on its own, customer and vehicle data together in one query
+    distance_matrix = deferred(Column(_JSONB))  # Distance matrix between locations
+    # Same matrix as raw float64 bytes, with its [rows, cols]; loaded on their own by distance_array
+    distance_matrix_blob = deferred(Column(LargeBinary), group='distance_blob')
+    distance_matrix_shape = deferred(Column(JSON), group='distance_blob')
+    customer_data = deferred(Column(_JSONB), group='payload')  # Customer locations, demands, time windows
+    vehicle_data = deferred(Column(_JSONB), group='payload')  # Vehicle capacities, costs, constraints
 
     # Solver settings
     solver_type = Column(String(50), default='pulp')  # 'pulp', 'ortools', 'gurobi'
-    solver_params = Column(JSON)  # Solver-specific parameters
+    solver_params = Column(_JSONB)  # Solver-specific parameters
 
     # Status
     status = Column(String(50), default='created')  # 'created', 'solving', 'solved', 'failed'
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Set by the database; onupdate renders NOW() into the UPDATE statement itself
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     solved_at = Column(DateTime)
 
     # Relationships
     constraints = relationship("VRPConstraint", back_populates="problem", cascade="all, delete-orphan")
     solutions = relationship("VRPSolution", back_populates="problem", cascade="all, delete-orphan")
+    customers = relationship("VRPCustomer", back_populates="problem", cascade="all, delete-orphan")
+    vehicles = relationship("VRPVehicle", back_populates="problem", cascade="all, delete-orphan")
+
+    @property
+    def distance_array(self):
+        """Distance matrix as a read-only float64 array, decoded straight from the binary column.
+
+        Problems saved with only the JSON matrix are converted on the fly; reading
+        never modifies the row.
+        """
+        if self.distance_matrix_blob is not None:
+            return np.frombuffer(self.distance_matrix_blob, dtype=np.float64).reshape(self.distance_matrix_shape)
+        if self.distance_matrix is None:
+            return None
+
+        array = np.array(self.distance_matrix, dtype=np.float64)
+        array.flags.writeable = False
+        return array
+
+    @distance_array.setter
+    def distance_array(self, matrix):
+        # The JSON column is kept in step for readers that still use it; the
+        # distance_matrix validator writes the binary copy
+        self.distance_matrix = None if matrix is None else np.asarray(matrix).tolist()
+
+    @validates('distance_matrix')
+    def _store_distance_blob(self, key, value):
+        # Every assignment of the JSON matrix (including the constructor's) writes its binary copy
+        try:
+            array = None if value is None else np.ascontiguousarray(value, dtype=np.float64)
+        except (TypeError, ValueError):
+            array = None  # Not a numeric matrix; distance_array falls back to the JSON
+        self.distance_matrix_blob = None if array is None else array.tobytes()
+        self.distance_matrix_shape = None if array is None else list(array.shape)
+        return value
+
+    # Columns of to_dict(); list_dicts() adds the counts as subqueries
+    _dict_fields = ('id', 'name', 'description', 'num_vehicles', 'depot_location', 'status', 'created_at', 'updated_at')
+
+    @classmethod
+    def list_dicts(cls, session, ids: list = None) -> list:
+        """to_dict() of every problem (or the given ones) in a single query"""
+        constraint_count = (
+            select(func.count(VRPConstraint.id))
+            .where(VRPConstraint.problem_id == cls.id)
+            .scalar_subquery()
+            .label('constraint_count')
+        )
+        solution_count = (
+            select(func.count(VRPSolution.id))
+            .where(VRPSolution.problem_id == cls.id)
+            .scalar_subquery()
+            .label('solution_count')
+        )
+        columns = [getattr(cls, name) for name in cls._dict_fields] + [constraint_count, solution_count]
+        criteria = [cls.id.in_(ids)] if ids is not None else []
+        return _select_dicts(session, columns, *criteria)
+
+    @classmethod
+    def summary_rows(cls, session) -> list:
+        """Summary columns of every problem as named-tuple rows, for read-only listings.
+
+        Rows expose the _dict_fields by attribute (row.name, row.status, ...) with raw datetimes.
+        """
+        return session.execute(select(*[getattr(cls, name) for name in cls._dict_fields]).order_by(cls.id)).all()
 
     def to_dict(self):
         return {
@@ -55,12 +159,12 @@ class VRPProblem(Base):
         }
 
 
-class VRPConstraint(Base):
+class VRPConstraint(_ProblemChildRows, Base):
     """Natural language constraints for VRP problems"""
     __tablename__ = 'vrp_constraints'
 
     id = Column(Integer, primary_key=True)
-    problem_id = Column(Integer, ForeignKey('vrp_problems.id'), nullable=False)
+    problem_id = Column(Integer, ForeignKey('vrp_problems.id'), nullable=False, index=True)
 
     # Original constraint
     original_prompt = Column(Text, nullable=False)
@@ -68,23 +172,26 @@ class VRPConstraint(Base):
 
     # Parsed constraint
     constraint_type = Column(String(100))  # 'capacity', 'time_window', 'distance', etc.
-    parameters = Column(JSON)  # Extracted parameters
-    mathematical_format = Column(JSON)  # Mathematical representation
+    parameters = Column(_JSONB)  # Extracted parameters
+    mathematical_format = Column(_JSONB)  # Mathematical representation
 
     # Processing metadata
     parsing_method = Column(String(50))  # 'pattern_matching', 'llm_parsing'
     confidence = Column(Float, default=0.0)
     validation_status = Column(String(50), default='valid')  # 'valid', 'invalid', 'warning'
-    validation_details = Column(JSON)  # Validation errors/warnings
+    validation_details = Column(_JSONB)  # Validation errors/warnings
 
     # Status
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     applied_to_solver = Column(Boolean, default=False)
 
     # Relationships
     problem = relationship("VRPProblem", back_populates="constraints")
 
+    _dict_fields = ('id', 'problem_id', 'original_prompt', 'constraint_type', 'parameters', 'parsing_method',
+                    'confidence', 'validation_status', 'is_active', 'created_at')
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -100,12 +207,12 @@ class VRPConstraint(Base):
         }
 
 
-class VRPSolution(Base):
+class VRPSolution(_ProblemChildRows, Base):
     """Solutions for VRP problems"""
     __tablename__ = 'vrp_solutions'
 
     id = Column(Integer, primary_key=True)
-    problem_id = Column(Integer, ForeignKey('vrp_problems.id'), nullable=False)
+    problem_id = Column(Integer, ForeignKey('vrp_problems.id'), nullable=False, index=True)
 
     # Solution metadata
     solution_name = Column(String(255))
@@ -118,25 +225,29 @@ class VRPSolution(Base):
     total_time = Column(Float)  # Total time
     vehicles_used = Column(Integer)  # Number of vehicles actually used
 
-    # Solution data
-    routes = Column(JSON)  # Route for each vehicle
-    route_details = Column(JSON)  # Detailed route information
-    unserved_customers = Column(JSON)  # Customers that couldn't be served
+    # Solution data. Deferred like the constraint satisfaction columns below: to_dict() and
+    # listings never read them, and all five load together on first access
+    routes = deferred(Column(_JSONB), group='payload')  # Route for each vehicle
+    route_details = deferred(Column(_JSONB), group='payload')  # Detailed route information
+    unserved_customers = deferred(Column(_JSONB), group='payload')  # Customers that couldn't be served
 
     # Constraint satisfaction
-    constraints_satisfied = Column(JSON)  # Which constraints were satisfied
-    constraint_violations = Column(JSON)  # Any constraint violations
+    constraints_satisfied = deferred(Column(_JSONB), group='payload')  # Which constraints were satisfied
+    constraint_violations = deferred(Column(_JSONB), group='payload')  # Any constraint violations
 
     # Status
     is_feasible = Column(Boolean, default=True)
     is_optimal = Column(Boolean, default=False)
     gap_percent = Column(Float)  # Optimality gap for MIP solvers
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     problem = relationship("VRPProblem", back_populates="solutions")
 
+    _dict_fields = ('id', 'problem_id', 'solution_name', 'solver_used', 'solve_time_seconds', 'objective_value',
+                    'total_distance', 'vehicles_used', 'is_feasible', 'is_optimal', 'created_at')
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -153,9 +264,13 @@ class VRPSolution(Base):
         }
 
 
-class VRPCustomer(Base):
+class VRPCustomer(_ProblemChildRows, Base):
     """Customer/location data for VRP problems"""
     __tablename__ = 'vrp_customers'
+    __table_args__ = (
+        # Leading problem_id also serves plain per-problem lookups
+        Index('ix_vrp_customers_problem_active', 'problem_id', 'is_active'),
+    )
 
     id = Column(Integer, primary_key=True)
     problem_id = Column(Integer, ForeignKey('vrp_problems.id'), nullable=False)
@@ -179,12 +294,18 @@ class VRPCustomer(Base):
 
     # Priority and special requirements
     priority = Column(Integer, default=1)  # 1=normal, 2=high, 3=critical
-    special_requirements = Column(JSON)  # Vehicle type requirements, etc.
+    special_requirements = Column(_JSONB)  # Vehicle type requirements, etc.
 
     # Status
     is_depot = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
 
+    # Relationships
+    problem = relationship("VRPProblem", back_populates="customers")
+
+    _dict_fields = ('id', 'problem_id', 'customer_id', 'customer_name', 'latitude', 'longitude', 'demand',
+                    'service_time', 'earliest_time', 'latest_time', 'priority', 'is_depot', 'is_active')
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -203,9 +324,13 @@ class VRPCustomer(Base):
         }
 
 
-class VRPVehicle(Base):
+class VRPVehicle(_ProblemChildRows, Base):
     """Vehicle data for VRP problems"""
     __tablename__ = 'vrp_vehicles'
+    __table_args__ = (
+        # Leading problem_id also serves plain per-problem lookups
+        Index('ix_vrp_vehicles_problem_available', 'problem_id', 'is_available'),
+    )
 
     id = Column(Integer, primary_key=True)
     problem_id = Column(Integer, ForeignKey('vrp_problems.id'), nullable=False)
@@ -235,12 +360,18 @@ class VRPVehicle(Base):
     end_location = Column(String(100))  # Can end at different location
 
     # Special capabilities
-    special_capabilities = Column(JSON)  # Refrigeration, crane, etc.
-    restricted_areas = Column(JSON)  # Areas this vehicle cannot visit
+    special_capabilities = Column(_JSONB)  # Refrigeration, crane, etc.
+    restricted_areas = Column(_JSONB)  # Areas this vehicle cannot visit
 
     # Status
     is_available = Column(Boolean, default=True)
 
+    # Relationships
+    problem = relationship("VRPProblem", back_populates="vehicles")
+
+    _dict_fields = ('id', 'problem_id', 'vehicle_id', 'vehicle_name', 'vehicle_type', 'weight_capacity',
+                    'volume_capacity', 'max_working_time', 'fixed_cost', 'distance_cost', 'is_available')
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -264,16 +395,32 @@ def create_vrp_tables(engine):
     Base.metadata.create_all(engine)
 
 
+def load_problem(session, problem_id: int):
+    """Load a VRP problem with all four collections, one IN query per collection instead of lazy loads"""
+    return (
+        session.query(VRPProblem)
+        .options(
+            selectinload(VRPProblem.constraints),
+            selectinload(VRPProblem.solutions),
+            selectinload(VRPProblem.customers),
+            selectinload(VRPProblem.vehicles)
+        )
+        .filter_by(id=problem_id)
+        .one_or_none()
+    )
+
+
 def get_problem_with_details(session, problem_id: int):
     """Get a VRP problem with all related data"""
-    problem = session.query(VRPProblem).filter(VRPProblem.id == problem_id).first()
-    if not problem:
+    problems = VRPProblem.list_dicts(session, ids=[problem_id])
+    if not problems:
         return None
 
+    # Constraints and solutions are only returned as dicts, so skip loading ORM objects for them
     return {
-        'problem': problem.to_dict(),
-        'constraints': [c.to_dict() for c in problem.constraints],
-        'solutions': [s.to_dict() for s in problem.solutions],
+        'problem': problems[0],
+        'constraints': VRPConstraint.list_dicts(session, problem_id),
+        'solutions': VRPSolution.list_dicts(session, problem_id),
         'customers': session.query(VRPCustomer).filter(VRPCustomer.problem_id == problem_id).all(),
         'vehicles': session.query(VRPVehicle).filter(VRPVehicle.problem_id == problem_id).all()
     }
@@ -281,20 +428,25 @@ def get_problem_with_details(session, problem_id: int):
 
 def save_processed_constraints(session, problem_id: int, processed_constraints: list):
     """Save processed constraints to database"""
-    for constraint_data in processed_constraints:
-        constraint = VRPConstraint(
-            problem_id=problem_id,
-            original_prompt=constraint_data.get('original_prompt', ''),
-            normalized_prompt=constraint_data.get('normalized_prompt', ''),
-            constraint_type=constraint_data.get('constraint_type', ''),
-            parameters=constraint_data.get('parameters', {}),
-            mathematical_format=constraint_data.get('mathematical_format', {}),
-            parsing_method=constraint_data.get('parsing_method', ''),
-            confidence=constraint_data.get('confidence', 0.0),
-            validation_status='valid' if constraint_data.get('validation', {}).get('is_valid', True) else 'invalid',
-            validation_details=constraint_data.get('validation', {})
-        )
-        session.add(constraint)
+    rows = [
+        {
+            'problem_id': problem_id,
+            'original_prompt': constraint_data.get('original_prompt', ''),
+            'normalized_prompt': constraint_data.get('normalized_prompt', ''),
+            'constraint_type': constraint_data.get('constraint_type', ''),
+            'parameters': constraint_data.get('parameters', {}),
+            'mathematical_format': constraint_data.get('mathematical_format', {}),
+            'parsing_method': constraint_data.get('parsing_method', ''),
+            'confidence': constraint_data.get('confidence', 0.0),
+            'validation_status': 'valid' if constraint_data.get('validation', {}).get('is_valid', True) else 'invalid',
+            'validation_details': constraint_data.get('validation', {})
+        }
+        for constraint_data in processed_constraints
+    ]
+
+    # One executemany INSERT for the batch instead of a tracked ORM object per row
+    if rows:
+        session.execute(insert(VRPConstraint), rows)
 
     session.commit()
 
@@ -0,0 +1,83 @@
+# backend/applications/vehicle_routing/route_kernels.py
+
+"""
+Route reconstruction kernels for solved route-variable arrays.
+
+Used by VRPSolverPuLP._extract_solution to walk each vehicle's route through the
+(N, N, K) array of active arcs and total its distance, demand and service time.
+The NumPy fallback scans one successor row per step.
+"""
+
+import numpy as np
+
+try:
+    from .kernel_jit import jit_kernel
+except ImportError:
+    from kernel_jit import jit_kernel
+
+
+def _walk_routes_loop(active, dist, depot, demands, service, used):
+    # Row k of stops holds vehicle k's route (depot first and last), padded with -1
+    n_nodes = active.shape[0]
+    vehicle_count = active.shape[2]
+    stops = np.full((vehicle_count, n_nodes + 1), -1, dtype=np.int64)
+    lengths = np.zeros(vehicle_count, dtype=np.int64)
+    totals = np.zeros((vehicle_count, 3), dtype=np.float64)
+    for k in range(vehicle_count):
+        if not used[k]:
+            continue
+        visited = np.zeros(n_nodes, dtype=np.bool_)
+        visited[depot] = True
+        stops[k, 0] = depot
+        count = 1
+        current = depot
+        while True:
+            nxt = -1
+            for j in range(n_nodes):
+                if active[current, j, k] and not visited[j]:
+                    nxt = j
+                    break
+            if nxt < 0:
+                break
+            visited[nxt] = True
+            totals[k, 0] += dist[current, nxt]
+            totals[k, 1] += demands[nxt]
+            totals[k, 2] += service[nxt]
+            stops[k, count] = nxt
+            count += 1
+            current = nxt
+        if current != depot:
+            totals[k, 0] += dist[current, depot]
+            stops[k, count] = depot
+            count += 1
+        lengths[k] = count
+    return stops, lengths, totals
+
+
+def _walk_routes_numpy(active, dist, depot, demands, service, used):
+    n_nodes = active.shape[0]
+    vehicle_count = active.shape[2]
+    stops = np.full((vehicle_count, n_nodes + 1), -1, dtype=np.int64)
+    lengths = np.zeros(vehicle_count, dtype=np.int64)
+    totals = np.zeros((vehicle_count, 3), dtype=np.float64)
+    for k in np.flatnonzero(used):
+        unvisited = np.ones(n_nodes, dtype=bool)
+        unvisited[depot] = False
+        route = [depot]
+        while True:
+            successors = np.flatnonzero(active[route[-1], :, k] & unvisited)
+            if successors.size == 0:
+                break
+            unvisited[successors[0]] = False
+            route.append(int(successors[0]))
+        visits = np.asarray(route[1:], dtype=np.int64)
+        if route[-1] != depot:
+            route.append(depot)
+        legs = np.asarray(route, dtype=np.int64)
+        stops[k, :legs.size] = legs
+        lengths[k] = legs.size
+        totals[k] = (dist[legs[:-1], legs[1:]].sum(), demands[visits].sum(), service[visits].sum())
+    return stops, lengths, totals
+
+
+walk_routes = jit_kernel(_walk_routes_loop, _walk_routes_numpy)
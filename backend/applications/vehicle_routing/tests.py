@@ -0,0 +1,125 @@
+# backend/applications/vehicle_routing/tests.py
+
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+from .enhanced_constraint_applier import EnhancedConstraintApplier
+from .enhanced_constraint_parser import EnhancedConstraintParser
+from .vrp_solver import VRPSolverPuLP
+
+
+def _random_problem(num_locations: int, num_vehicles: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    points = [(rng.random() * 100, rng.random() * 100) for _ in range(num_locations)]
+    return {
+        'distance_matrix': [[round(((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5) for b in points]
+                            for a in points],
+        'num_vehicles': num_vehicles,
+        'depot': 0,
+        'customers': [{'id': str(i), 'demand': 0 if i == 0 else rng.randint(1, 9)} for i in range(num_locations)],
+        'vehicles': [{'id': str(k + 1), 'capacity': 40} for k in range(num_vehicles)],
+    }
+
+
+class ArcPruningTest(unittest.TestCase):
+    """Route variables on near-neighbour arcs only (VRPSolverPuLP(arc_neighbours=...))"""
+
+    prompts = ["Each vehicle can carry maximum 30 units", "Customer 3 must be visited between 9:00 and 17:00"]
+
+    def _solve(self, arc_neighbours=None) -> dict:
+        solver = VRPSolverPuLP(arc_neighbours=arc_neighbours)
+        with redirect_stdout(io.StringIO()):
+            solver.setup_problem(_random_problem(10, 2, 5))
+            solver.add_multiple_constraints(self.prompts)
+            return solver.solve(time_limit=60, verbose=False)
+
+    def test_pruning_is_off_by_default(self):
+        solution = self._solve()
+        self.assertTrue(solution['success'], solution.get('error'))
+        self.assertEqual(solution['status'], 'optimal')
+        self.assertTrue(solution['is_optimal'])
+
+    def test_pruned_objective_is_never_better_and_not_reported_optimal(self):
+        full = self._solve()
+        pruned = self._solve(arc_neighbours=3)
+        self.assertTrue(pruned['success'], pruned.get('error'))
+        self.assertGreaterEqual(pruned['objective_value'], full['objective_value'] - 1e-6)
+        self.assertEqual(pruned['status'], 'feasible')
+        self.assertFalse(pruned['is_optimal'])
+
+    def test_enough_neighbours_keeps_every_arc(self):
+        full = self._solve()
+        unpruned = self._solve(arc_neighbours=9)
+        self.assertEqual(unpruned['status'], 'optimal')
+        self.assertAlmostEqual(unpruned['objective_value'], full['objective_value'], places=6)
+
+
+class MultiPartPatternTest(unittest.TestCase):
+    """Pattern-matched "minimum N vehicles ... node pair" constraints"""
+
+    @classmethod
+    def setUpClass(cls):
+        with redirect_stdout(io.StringIO()):
+            cls.parser = EnhancedConstraintParser()
+
+    def _parse(self, prompt: str):
+        return self.parser._pattern_match_constraint(prompt)
+
+    def test_accepted_phrasings(self):
+        cases = [
+            ("Minimum 2 vehicles should be used and node 1 and node 2 should be served together", 2, [1, 2], 'grouping'),
+            ("At least 3 vehicles should be used, also node 4 and 7 should be on different routes", 3, [4, 7], 'separation'),
+            ("Employ minimum 3 vehicles, additionally node 2 and 8 should be in the same route", 3, [2, 8], 'grouping'),
+            ("Use at least 2 vehicles and customer 3 and customer 5 should not be served together", 2, [3, 5], 'separation'),
+            ("Minimum 2 vehicles should be used and nodes 1 and 2 should be together in a route", 2, [1, 2], 'grouping'),
+            ("Minimum 2 vehicles should be used.\nNode 1 and node 6 should be covered under the same route", 2, [1, 6], 'grouping'),
+        ]
+        for prompt, min_vehicles, nodes, node_constraint_type in cases:
+            with self.subTest(prompt=prompt):
+                parsed = self._parse(prompt)
+                self.assertIsNotNone(parsed)
+                self.assertEqual(parsed.constraint_type, 'multi_part')
+                self.assertEqual(parsed.parameters, {
+                    'min_vehicles': min_vehicles, 'nodes': nodes, 'node_constraint_type': node_constraint_type})
+
+    def test_rejected_phrasings(self):
+        # Without "should be used" (or "use N vehicles"), the joiner, or "should" before the node phrase
+        prompts = [
+            "we have at least 3 vehicles in the fleet; customers 1 and 2 on the same route",
+            "minimum 2 vehicles are parked at the depot, node 4 and 7 in same route",
+            "Minimum 2 vehicles should be used and node 1 and node 2 on the same route",
+            "At least 2 vehicles should be used. Node 1 and node 6 should be grouped on the same route",
+        ]
+        for prompt in prompts:
+            with self.subTest(prompt=prompt):
+                parsed = self._parse(prompt)
+                self.assertTrue(parsed is None or parsed.constraint_type != 'multi_part')
+
+
+class NotedConstraintTest(unittest.TestCase):
+    """Route and priority constraints are noted without adding model rows"""
+
+    def test_results_are_per_constraint(self):
+        with redirect_stdout(io.StringIO()):
+            parser = EnhancedConstraintParser()
+        applier = EnhancedConstraintApplier()
+        first = parser._pattern_match_constraint("Node 3 has HIGH priority")
+        second = parser._pattern_match_constraint("Prioritize customer 7")
+        route = parser._pattern_match_constraint("Maximum route length should be 120 km")
+
+        results = [applier._apply_single_constraint(None, c, None, i)
+                   for i, c in enumerate((first, second, route))]
+        self.assertEqual([r['details'] for r in results], [
+            "Priority constraint noted for node 3 (high)",
+            "Priority constraint noted for node 7 (high)",
+            "Route constraint noted (requires distance matrix): max distance 120.0",
+        ])
+        self.assertTrue(all(r['success'] and r['mathematical_constraints_added'] == 0 for r in results))
+        results[0]['warning'] = 'changed'
+        self.assertNotEqual(applier._apply_single_constraint(None, first, None, 3)['warning'], 'changed')
+
+
+if __name__ == '__main__':
+    unittest.main()
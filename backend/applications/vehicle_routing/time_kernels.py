@@ -0,0 +1,49 @@
+# backend/applications/vehicle_routing/time_kernels.py
+
+"""
+Numeric kernels for bulk time-window conversion.
+
+Used by ConstraintConverter.convert_time_window_constraints_batch.
+"""
+
+import numpy as np
+
+try:
+    from .kernel_jit import jit_kernel
+except ImportError:
+    from kernel_jit import jit_kernel
+
+# Period codes for the `periods` array
+PERIOD_NONE = 0
+PERIOD_AM = 1
+PERIOD_PM = 2
+
+
+def period_code(period: str) -> int:
+    """Map a captured am/pm string (any case, possibly empty) to its period code"""
+    if period and period[0] in ('p', 'P'):
+        return PERIOD_PM
+    if period and period[0] in ('a', 'A'):
+        return PERIOD_AM
+    return PERIOD_NONE
+
+
+def _to_minutes_loop(hours, minutes, periods):
+    out = np.empty(hours.shape[0], dtype=np.int64)
+    for i in range(hours.shape[0]):
+        h = hours[i]
+        if periods[i] == PERIOD_PM and h != 12:
+            h += 12
+        elif periods[i] == PERIOD_AM and h == 12:
+            h = 0
+        out[i] = h * 60 + minutes[i]
+    return out
+
+
+def _to_minutes_numpy(hours, minutes, periods):
+    h = np.where((periods == PERIOD_PM) & (hours != 12), hours + 12, hours)
+    h = np.where((periods == PERIOD_AM) & (h == 12), 0, h)
+    return (h * 60 + minutes).astype(np.int64)
+
+
+to_minutes = jit_kernel(_to_minutes_loop, _to_minutes_numpy)
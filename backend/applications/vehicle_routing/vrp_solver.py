@@ -5,8 +5,120 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 import time
 import json
+from functools import lru_cache
 from .constraint_processor import ConstraintProcessor
 from .models import VRPProblem, VRPSolution, save_solution
+from .route_kernels import walk_routes
+
+try:
+    import highspy
+    HIGHSPY_AVAILABLE = True
+except ImportError:
+    HIGHSPY_AVAILABLE = False
+    highspy = None
+
+try:
+    import gurobipy as gp
+    GUROBIPY_AVAILABLE = True
+except ImportError:
+    GUROBIPY_AVAILABLE = False
+    gp = None
+
+# Extra CBC command-line switches (PuLP prefixes each entry with '-')
+_CBC_OPTIONS = ['preprocess on', 'cuts on']
+
+# 'solver' value reported in solutions, by PuLP solver name
+_SOLVER_LABELS = {'PULP_CBC_CMD': 'pulp_cbc', 'HiGHS': 'pulp_highs'}
+
+# From this many locations on, HiGHS solves take the model as sparse arrays built
+# with NumPy instead of PuLP expressions
+_SPARSE_HIGHS_MIN_LOCATIONS = 50
+
+
+@lru_cache(maxsize=1)
+def _available_solvers() -> Tuple[str, ...]:
+    """Names of the PuLP solvers usable in this environment"""
+    return tuple(pulp.listSolvers(onlyAvailable=True))
+
+
+class _WarmStartHiGHS(pulp.HiGHS):
+    """pulp.HiGHS that passes the variables' initial values to HiGHS as a MIP start"""
+
+    def callSolver(self, lp):
+        # Columns are added in lp.variables() order by buildSolverModel
+        seeded = [(i, var.varValue) for i, var in enumerate(lp.variables()) if var.varValue is not None]
+        if seeded:
+            index, value = zip(*seeded)
+            lp.solverModel.setSolution(
+                len(seeded), np.array(index, dtype=np.int32), np.array(value, dtype=np.float64)
+            )
+        super().callSolver(lp)
+
+
+class _SparseRows:
+    """Constraint rows collected as COO triples and passed to HiGHS in CSR form"""
+
+    def __init__(self):
+        self.num_rows = 0
+        self._rows, self._cols, self._values = [], [], []
+        self._lower, self._upper = [], []
+
+    def add(self, count: int, rows, cols, values, lower, upper):
+        """
+        Append count rows. rows numbers the entries' rows within the block (from 0);
+        values, lower and upper may be scalars. Use +/-highspy.kHighsInf for open sides.
+        """
+        cols = np.asarray(cols, dtype=np.int64).ravel()
+        self._rows.append(np.asarray(rows, dtype=np.int64).ravel() + self.num_rows)
+        self._cols.append(cols)
+        self._values.append(np.broadcast_to(np.asarray(values, dtype=np.float64).ravel(), cols.shape))
+        self._lower.append(np.broadcast_to(np.asarray(lower, dtype=np.float64), (count,)))
+        self._upper.append(np.broadcast_to(np.asarray(upper, dtype=np.float64), (count,)))
+        self.num_rows += count
+
+    def add_per_vehicle(self, x_col: np.ndarray, arcs: np.ndarray, coefs, lower, upper):
+        """One row per vehicle k: sum of coefs[a] * x[a, k] over the given arc positions"""
+        num_vehicles = x_col.shape[1]
+        coefs = np.broadcast_to(np.asarray(coefs, dtype=np.float64), arcs.shape)
+        self.add(num_vehicles, np.tile(np.arange(num_vehicles), arcs.size), x_col[arcs],
+                 np.repeat(coefs, num_vehicles), lower, upper)
+
+    def pass_to(self, highs):
+        """Add the collected rows to a highspy.Highs model"""
+        rows = np.concatenate(self._rows)
+        order = np.argsort(rows, kind='stable')
+        starts = np.searchsorted(rows[order], np.arange(self.num_rows))
+        highs.addRows(
+            self.num_rows, np.concatenate(self._lower), np.concatenate(self._upper), order.size,
+            starts.astype(np.int32), np.concatenate(self._cols)[order].astype(np.int32),
+            np.concatenate(self._values)[order]
+        )
+
+
+def _find_subtours(arc_values: np.ndarray, depot: int) -> List[List[int]]:
+    """Node lists of the cycles in an integer (n, n, V) arc solution that skip the depot"""
+    used = arc_values.sum(axis=2) > 0.5
+    successor = {i: j for i, j in zip(*np.nonzero(used)) if i != depot}
+
+    # Everything reachable from the depot lies on a proper route
+    seen = {depot}
+    for node in np.nonzero(used[depot])[0]:
+        while node not in seen:
+            seen.add(node)
+            node = successor.get(node, depot)
+
+    subtours = []
+    for start in successor:
+        if start in seen:
+            continue
+        tour = []
+        node = start
+        while node not in seen:
+            seen.add(node)
+            tour.append(int(node))
+            node = successor.get(node, depot)
+        subtours.append(tour)
+    return subtours
 
 
 class VRPSolverPuLP:
@@ -15,13 +127,29 @@ class VRPSolverPuLP:
     Adapted from OR-Tools to work with your existing PuLP + CBC setup
     """
 
-    def __init__(self, use_llm: bool = False, llm_api_key: Optional[str] = None):
+    def __init__(self, use_llm: bool = False, llm_api_key: Optional[str] = None,
+                 arc_neighbours: Optional[int] = None):
+        """
+        Args:
+            use_llm: Parse constraints with the LLM as well as with patterns
+            llm_api_key: API key for the LLM parser
+            arc_neighbours: If set, only arcs between each location and its arc_neighbours
+                nearest neighbours (in either direction) plus the depot arcs get route
+                variables. This shrinks large models but can cut off the best routes, so
+                such solutions are reported as feasible, never optimal. Default: every arc.
+        """
+        self.arc_neighbours = arc_neighbours
         self.constraint_processor = ConstraintProcessor(use_llm, llm_api_key)
         self.problem_data = {}
         self.processed_constraints = []
         self.pulp_problem = None
         self.variables = {}
         self.solution_data = {}
+        self.solver_name = None
+        # Variable values (by name) from the last successful solve, used as a MIP start
+        self._last_incumbent: Dict[str, float] = {}
+        # Column values from the last successful sparse HiGHS solve, used the same way
+        self._last_sparse_solution: Optional[np.ndarray] = None
 
     def setup_problem(self, problem_data: Dict):
         """
@@ -44,6 +172,8 @@ class VRPSolverPuLP:
                 raise ValueError(f"Missing required field: {field}")
 
         self.problem_data = problem_data
+        self._last_incumbent = {}
+        self._last_sparse_solution = None
 
         # Set default values
         if 'customers' not in problem_data:
@@ -59,6 +189,16 @@ class VRPSolverPuLP:
                 for i in range(problem_data['num_vehicles'])
             ]
 
+        # Problem dimensions and data read once for every model build
+        self._dist = np.asarray(problem_data['distance_matrix'])
+        self._n = self._dist.shape[0]
+        self._V = problem_data['num_vehicles']
+        self._depot = problem_data['depot']
+        self._arc_mask = self._candidate_arcs()
+        self._arcs_pruned = bool(self._arc_mask.sum() < self._n * (self._n - 1))
+        # Per-customer demand, read once for the capacity rows and the route totals
+        self._demands = np.array([customer.get('demand', 0) for customer in problem_data['customers']])
+
         print(
             f"✅ Problem setup complete: {len(problem_data['customers'])} locations, {problem_data['num_vehicles']} vehicles")
 
@@ -90,13 +230,17 @@ class VRPSolverPuLP:
 
         return results
 
-    def solve(self, time_limit: int = 300, verbose: bool = True) -> Dict:
+    def solve(self, time_limit: int = 300, verbose: bool = True,
+              solver_name: Optional[str] = None) -> Dict:
         """
         Solve the VRP with all processed constraints using PuLP
 
         Args:
             time_limit: Maximum solving time in seconds
             verbose: Print solving progress
+            solver_name: PuLP solver to use (e.g. 'GUROBI', 'HiGHS', 'PULP_CBC_CMD');
+                defaults to in-process HiGHS, else CBC. Gurobi is only used when named.
+                HiGHS solves of larger problems build the model directly in highspy.
 
         Returns:
             Dict with solution results
@@ -108,6 +252,10 @@ class VRPSolverPuLP:
         start_time = time.time()
 
         try:
+            solver_name = self._resolve_solver_name(solver_name)
+            if solver_name == 'HiGHS' and self._n >= _SPARSE_HIGHS_MIN_LOCATIONS:
+                return self._solve_sparse_highs(time_limit, verbose, start_time)
+
             # Step 1: Create PuLP problem
             self._create_pulp_problem()
 
@@ -127,17 +275,22 @@ class VRPSolverPuLP:
             if verbose:
                 print(f"🚀 Solving VRP with {len(self.processed_constraints)} additional constraints...")
 
-            # Use CBC solver with time limit
-            solver = pulp.PULP_CBC_CMD(timeLimit=time_limit, msg=verbose)
-            self.pulp_problem.solve(solver)
+            warm_start = self._seed_warm_start()
+            solver = self._get_solver(solver_name, time_limit, verbose, warm_start)
+            if self.solver_name == 'GUROBI':
+                # Subtours are cut off only when an incumbent actually contains one
+                self.pulp_problem.solve(solver, callback=self._lazy_subtour_callback())
+            else:
+                self.pulp_problem.solve(solver)
 
             solve_time = time.time() - start_time
 
             # Step 7: Process results
-            if self.pulp_problem.status == pulp.LpStatusOptimal:
+            if self._proven_optimal():
                 if verbose:
                     print(f"✅ Optimal solution found in {solve_time:.2f} seconds!")
 
+                self._record_incumbent()
                 solution = self._extract_solution()
                 solution['solve_time'] = solve_time
                 solution['status'] = 'optimal'
@@ -145,10 +298,13 @@ class VRPSolverPuLP:
 
                 return solution
 
-            elif self.pulp_problem.status == pulp.LpStatusFeasible:
+            elif self.pulp_problem.status == pulp.LpStatusOptimal:
+                # PuLP also reports an incumbent stopped by the time limit, or any
+                # solution over a pruned arc set, as LpStatusOptimal
                 if verbose:
                     print(f"✅ Feasible solution found in {solve_time:.2f} seconds")
 
+                self._record_incumbent()
                 solution = self._extract_solution()
                 solution['solve_time'] = solve_time
                 solution['status'] = 'feasible'
@@ -169,7 +325,7 @@ class VRPSolverPuLP:
                     'success': False,
                     'status': status,
                     'solve_time': solve_time,
-                    'error': f'Problem is {status}'
+                    'error': f'Problem is {status}{self._pruning_note()}'
                 }
 
         except Exception as e:
@@ -179,27 +335,308 @@ class VRPSolverPuLP:
                 'solve_time': time.time() - start_time
             }
 
+    def _proven_optimal(self) -> bool:
+        """Whether the PuLP solve proved optimality over every arc"""
+        return (self.pulp_problem.status == pulp.LpStatusOptimal
+                and self.pulp_problem.sol_status == pulp.LpSolutionOptimal
+                and not self._arcs_pruned)
+
+    def _pruning_note(self) -> str:
+        """Suffix for failure messages when the model only had the pruned arcs"""
+        if not self._arcs_pruned:
+            return ''
+        return f' with arcs limited to the {self.arc_neighbours} nearest neighbours'
+
+    def _get_solver(self, solver_name: Optional[str], time_limit: int, verbose: bool,
+                    warm_start: bool = False):
+        """Create the MILP solver: in-process HiGHS, CBC, or Gurobi (with lazy subtour cuts)"""
+        solver_name = self._resolve_solver_name(solver_name)
+
+        self.solver_name = solver_name
+        if solver_name == 'PULP_CBC_CMD':
+            return pulp.PULP_CBC_CMD(timeLimit=time_limit, msg=verbose, options=list(_CBC_OPTIONS),
+                                     warmStart=warm_start)
+        if solver_name == 'GUROBI':
+            return pulp.GUROBI(timeLimit=time_limit, msg=verbose, warmStart=warm_start, LazyConstraints=1)
+        if solver_name == 'HiGHS':
+            # pulp.HiGHS has no warmStart option of its own
+            highs_class = _WarmStartHiGHS if warm_start else pulp.HiGHS
+            return highs_class(timeLimit=time_limit, msg=verbose)
+        if warm_start:
+            return pulp.getSolver(solver_name, timeLimit=time_limit, msg=verbose, warmStart=True)
+        return pulp.getSolver(solver_name, timeLimit=time_limit, msg=verbose)
+
+    def _resolve_solver_name(self, solver_name: Optional[str]) -> str:
+        """The requested solver if available, else in-process HiGHS if available, else CBC"""
+        available = _available_solvers()
+        if solver_name is None:
+            # Gurobi is never picked by default: PuLP reports it available with the size-limited
+            # licence bundled with pip-installed gurobipy, which fails on all but small models
+            return 'HiGHS' if 'HiGHS' in available else 'PULP_CBC_CMD'
+        if solver_name not in available:
+            raise ValueError(f"Solver {solver_name} is not available (available: {', '.join(available)})")
+        return solver_name
+
+    def _arc_cells(self) -> np.ndarray:
+        """(n, n, V) mask of the cells of self.variables['x'] that hold a variable"""
+        return np.repeat(self._arc_mask[:, :, np.newaxis], self.variables['x'].shape[2], axis=2)
+
+    def _arc_values(self) -> np.ndarray:
+        """Solved values of x as an (n, n, V) float array, 0 where there is no variable"""
+        x = self.variables['x']
+        cells = self._arc_cells()
+        values = np.zeros(x.shape)
+        values[cells] = [var.varValue or 0.0 for var in x[cells]]
+        return values
+
+    def _lazy_subtour_callback(self):
+        """
+        Gurobi callback that adds, for every subtour S in a new incumbent,
+        sum(x[i, j, k] for i, j in S, all k) <= |S| - 1 as a lazy constraint
+        """
+        x = self.variables['x']
+        depot = self._depot
+        arcs = self._arc_cells()
+        # Gurobi variables only exist once PuLP has built the solver model
+        solver_vars = []
+
+        def callback(model, where):
+            if where != gp.GRB.Callback.MIPSOL:
+                return
+            if not solver_vars:
+                solver_vars.extend(var.solverVar for var in x[arcs])
+            values = np.zeros(x.shape)
+            values[arcs] = model.cbGetSolution(solver_vars)
+            for tour in _find_subtours(values, depot):
+                model.cbLazy(
+                    gp.quicksum(x[i, j, k].solverVar for i in tour for j in tour if self._arc_mask[i, j]
+                                for k in range(x.shape[2])) <= len(tour) - 1
+                )
+
+        return callback
+
+    def _record_incumbent(self):
+        """Remember the solved variable values so the next solve can start from them"""
+        self._last_incumbent = {
+            v.name: v.varValue for v in self.pulp_problem.variables() if v.varValue is not None
+        }
+
+    def _seed_warm_start(self) -> bool:
+        """Set initial values from the last incumbent on the variables of the rebuilt model"""
+        if not self._last_incumbent:
+            return False
+        seeded = 0
+        for var in self.pulp_problem.variables():
+            val = self._last_incumbent.get(var.name)
+            if val is not None:
+                # Solver values carry float noise and bounds may have tightened since
+                # (e.g. a new vehicle restriction), so fit the value to the current bounds
+                if var.cat == pulp.LpInteger:
+                    val = round(val)
+                if var.lowBound is not None:
+                    val = max(val, var.lowBound)
+                if var.upBound is not None:
+                    val = min(val, var.upBound)
+                var.setInitialValue(val)
+                seeded += 1
+        return seeded > 0
+
+    def _solve_sparse_highs(self, time_limit: int, verbose: bool, start_time: float) -> Dict:
+        """
+        Build the same model as the PuLP path straight into highspy, as column arrays
+        and CSR rows assembled with NumPy, and solve it. Columns are x[a, k] for every
+        candidate arc a (in np.nonzero order), then arrival[i, k], then vehicle_used[k].
+        """
+        num_locations = self._n
+        num_vehicles = self._V
+        depot = self._depot
+        customers = self.problem_data.get('customers', [])
+        inf = highspy.kHighsInf
+
+        arc_from, arc_to = np.nonzero(self._arc_mask)
+        x_col = np.arange(arc_from.size * num_vehicles).reshape(arc_from.size, num_vehicles)
+        arrival_col = x_col.size + np.arange(num_locations * num_vehicles).reshape(num_locations, num_vehicles)
+        used_col = x_col.size + arrival_col.size + np.arange(num_vehicles)
+        num_cols = x_col.size + arrival_col.size + num_vehicles
+
+        cost = np.zeros(num_cols)
+        lower = np.zeros(num_cols)
+        upper = np.ones(num_cols)
+        upper[arrival_col] = inf
+        arc_distance = self._dist[arc_from, arc_to].astype(np.float64)
+        cost[x_col] = arc_distance[:, np.newaxis]
+        for k, vehicle in enumerate(self.problem_data.get('vehicles', [])[:num_vehicles]):
+            fixed_cost = vehicle.get('fixed_cost', 0)
+            if fixed_cost > 0:
+                cost[used_col[k]] = fixed_cost
+
+        rows = _SparseRows()
+
+        # Each customer is visited exactly once
+        visit_row = np.cumsum(np.arange(num_locations) != depot) - 1
+        into = np.flatnonzero(arc_to != depot)
+        rows.add(num_locations - 1, np.repeat(visit_row[arc_to[into]], num_vehicles), x_col[into], 1.0, 1.0, 1.0)
+
+        # Flow conservation: row i * V + k gets +x on arcs into i and -x on arcs out of i
+        vehicle_idx = np.arange(num_vehicles)
+        rows.add(
+            num_locations * num_vehicles,
+            np.concatenate([(arc_to[:, np.newaxis] * num_vehicles + vehicle_idx).ravel(),
+                            (arc_from[:, np.newaxis] * num_vehicles + vehicle_idx).ravel()]),
+            np.concatenate([x_col.ravel(), x_col.ravel()]),
+            np.concatenate([np.ones(x_col.size), -np.ones(x_col.size)]), 0.0, 0.0
+        )
+
+        # Depot start at most once, linked to vehicle usage, and return at most once
+        starts = np.flatnonzero(arc_from == depot)
+        rows.add_per_vehicle(x_col, starts, 1.0, -inf, 1.0)
+        rows.add(
+            num_vehicles, np.concatenate([np.tile(vehicle_idx, starts.size), vehicle_idx]),
+            np.concatenate([x_col[starts].ravel(), used_col]),
+            np.concatenate([-np.ones(starts.size * num_vehicles), np.ones(num_vehicles)]), 0.0, 0.0
+        )
+        rows.add_per_vehicle(x_col, np.flatnonzero(arc_to == depot), 1.0, -inf, 1.0)
+
+        pulp_constraints = self.constraint_processor.export_constraints_for_solver(
+            self.processed_constraints, 'pulp'
+        )
+
+        # Capacity: demand of customer j counted on every arc into j
+        node_demand = np.zeros(num_locations)
+        node_demand[:len(self._demands)] = self._demands[:num_locations]
+        demand_arcs = np.flatnonzero((arc_to != depot) & (node_demand[arc_to] != 0) & (arc_from < len(customers)))
+        for constraint in pulp_constraints['capacity_constraints']:
+            rows.add_per_vehicle(x_col, demand_arcs, node_demand[arc_to[demand_arcs]], -inf,
+                                 constraint['max_capacity'])
+
+        # Time windows: bounds on the arrival columns plus the arrival linking rows
+        window_start = np.zeros(num_locations)
+        window_end = np.full(num_locations, np.inf)
+        windows = [self._time_window(constraint) for constraint in pulp_constraints['time_constraints']]
+        for customer_index, lower_bound, upper_bound in filter(None, windows):
+            window_start[customer_index] = max(window_start[customer_index], lower_bound)
+            window_end[customer_index] = min(window_end[customer_index], upper_bound)
+        if any(windows):
+            latest, lead, big_m = self._arrival_link_terms(window_start, window_end)
+            lower[arrival_col] = window_start[:, np.newaxis]
+            upper[arrival_col] = latest[:, np.newaxis]
+            # Row (a, k): arrival[j, k] - arrival[i, k] - M[i, j] * x[a, k] >= lead[i, j] - M[i, j]
+            # for every arc a = (i, j) into a customer
+            link_m = big_m[arc_from[into], arc_to[into]]
+            link_values = np.empty((into.size, num_vehicles, 3))
+            link_values[:, :, 0] = 1.0
+            link_values[:, :, 1] = -1.0
+            link_values[:, :, 2] = -link_m[:, np.newaxis]
+            count = into.size * num_vehicles
+            rows.add(
+                count, np.repeat(np.arange(count), 3),
+                np.stack([arrival_col[arc_to[into]], arrival_col[arc_from[into]], x_col[into]], axis=2),
+                link_values, np.repeat(lead[arc_from[into], arc_to[into]] - link_m, num_vehicles), inf
+            )
+
+        # Maximum route distance
+        distance_arcs = np.flatnonzero(arc_distance != 0)
+        for constraint in pulp_constraints['distance_constraints']:
+            rows.add_per_vehicle(x_col, distance_arcs, arc_distance[distance_arcs], -inf,
+                                 constraint['max_distance'])
+
+        # Vehicle restrictions fix the arcs into the location at 0 through their upper bound
+        for constraint in pulp_constraints['vehicle_restrictions']:
+            vehicle_index = self._find_vehicle_index(constraint.get('vehicle'))
+            location_index = self._find_customer_index(constraint.get('location'))
+            if vehicle_index is None or location_index is None:
+                print(f"⚠️ Could not find vehicle {constraint.get('vehicle')} or location {constraint.get('location')}")
+                continue
+            arcs_in = x_col[(arc_to == location_index) & (arc_from < len(customers))]
+            if constraint['type'] == 'vehicle_location_forbidden':
+                upper[arcs_in[:, vehicle_index]] = 0
+            elif constraint['type'] == 'vehicle_location_exclusive':
+                upper[np.delete(arcs_in, vehicle_index, axis=1)] = 0
+
+        # Vehicle count limits
+        for constraint in pulp_constraints['vehicle_count_constraints']:
+            if constraint['type'] == 'min_vehicles':
+                rows.add(1, np.zeros(num_vehicles), used_col, 1.0, constraint['count'], inf)
+            elif constraint['type'] == 'max_vehicles':
+                rows.add(1, np.zeros(num_vehicles), used_col, 1.0, -inf, constraint['count'])
+
+        highs = highspy.Highs()
+        highs.setOptionValue('output_flag', verbose)
+        highs.setOptionValue('time_limit', float(time_limit))
+        highs.addCols(
+            num_cols, cost, lower, upper,
+            0, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+        )
+        integer_cols = np.concatenate([x_col.ravel(), used_col]).astype(np.int32)
+        highs.changeColsIntegrality(
+            integer_cols.size, integer_cols,
+            np.full(integer_cols.size, highspy.HighsVarType.kInteger, dtype=np.uint8)
+        )
+        rows.pass_to(highs)
+        if self._last_sparse_solution is not None and self._last_sparse_solution.size == num_cols:
+            highs.setSolution(num_cols, np.arange(num_cols, dtype=np.int32), self._last_sparse_solution)
+
+        if verbose:
+            print(f"🚀 Solving VRP with {len(self.processed_constraints)} additional constraints "
+                  f"(sparse HiGHS model: {num_cols} columns, {rows.num_rows} rows)...")
+
+        self.solver_name = 'HiGHS'
+        self.pulp_problem = None
+        highs.run()
+        solve_time = time.time() - start_time
+
+        model_status = highs.getModelStatus()
+        info = highs.getInfo()
+        if model_status == highspy.HighsModelStatus.kOptimal and not self._arcs_pruned:
+            status = 'optimal'
+        elif info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible:
+            status = 'feasible'
+        else:
+            status = {
+                highspy.HighsModelStatus.kInfeasible: 'infeasible',
+                highspy.HighsModelStatus.kUnbounded: 'unbounded',
+            }.get(model_status, 'undefined')
+            return {
+                'success': False,
+                'status': status,
+                'solve_time': solve_time,
+                'error': f'Problem is {status}{self._pruning_note()}'
+            }
+
+        if verbose:
+            print(f"✅ {status.capitalize()} solution found in {solve_time:.2f} seconds!")
+
+        values = np.asarray(highs.getSolution().col_value)
+        self._last_sparse_solution = values
+        arc_values = np.zeros((num_locations, num_locations, num_vehicles))
+        arc_values[arc_from, arc_to] = values[x_col]
+        solution = self._build_solution(arc_values, values[used_col] > 0.5,
+                                        info.objective_function_value, status == 'optimal')
+        solution['solve_time'] = solve_time
+        solution['status'] = status
+        solution['success'] = True
+        return solution
+
     def _create_pulp_problem(self):
         """Create the main PuLP optimization problem"""
         self.pulp_problem = pulp.LpProblem("VRP_with_Constraints", pulp.LpMinimize)
 
     def _create_variables(self):
         """Create decision variables for the VRP"""
-        num_locations = len(self.problem_data['distance_matrix'])
-        num_vehicles = self.problem_data['num_vehicles']
-
-        # Binary variables: x[i][j][k] = 1 if vehicle k goes from location i to j
-        self.variables['x'] = {}
-        for i in range(num_locations):
-            self.variables['x'][i] = {}
-            for j in range(num_locations):
-                if i != j:  # No self-loops
-                    self.variables['x'][i][j] = {}
-                    for k in range(num_vehicles):
-                        var_name = f"x_{i}_{j}_{k}"
-                        self.variables['x'][i][j][k] = pulp.LpVariable(
-                            var_name, cat='Binary'
-                        )
+        num_locations = self._n
+        num_vehicles = self._V
+
+        # Binary variables: x[i, j, k] = 1 if vehicle k goes from location i to j.
+        # Only arcs in self._arc_mask get a variable; the other cells (always
+        # including the diagonal) stay None.
+        x = np.empty((num_locations, num_locations, num_vehicles), dtype=object)
+        for i, j in zip(*np.nonzero(self._arc_mask)):
+            for k in range(num_vehicles):
+                var_name = f"x_{i}_{j}_{k}"
+                x[i, j, k] = pulp.LpVariable(
+                    var_name, cat='Binary'
+                )
+        self.variables['x'] = x
 
         # Continuous variables for arrival times (for time window constraints)
         self.variables['arrival_time'] = {}
@@ -221,20 +658,15 @@ class VRPSolverPuLP:
 
     def _set_objective(self):
         """Set the objective function (minimize total distance)"""
-        distance_matrix = self.problem_data['distance_matrix']
-        num_locations = len(distance_matrix)
-        num_vehicles = self.problem_data['num_vehicles']
-
-        # Minimize total travel distance
-        objective = 0
-        for i in range(num_locations):
-            for j in range(num_locations):
-                if i != j:
-                    for k in range(num_vehicles):
-                        objective += (
-                                distance_matrix[i][j] *
-                                self.variables['x'][i][j][k]
-                        )
+        num_vehicles = self._V
+        x = self.variables['x']
+
+        # Minimize total travel distance; zero-length arcs contribute nothing
+        terms = [
+            (x[i, j, k], distance)
+            for i, j, distance in self._nonzero_arcs(self._dist)
+            for k in range(num_vehicles)
+        ]
 
         # Add vehicle fixed costs if specified
         vehicles = self.problem_data.get('vehicles', [])
@@ -242,62 +674,83 @@ class VRPSolverPuLP:
             if k < num_vehicles:
                 fixed_cost = vehicle.get('fixed_cost', 0)
                 if fixed_cost > 0:
-                    objective += fixed_cost * self.variables['vehicle_used'][k]
+                    terms.append((self.variables['vehicle_used'][k], fixed_cost))
+
+        self.pulp_problem += pulp.LpAffineExpression(terms)
 
-        self.pulp_problem += objective
+    def _nonzero_arcs(self, matrix) -> List[Tuple[int, int, float]]:
+        """(i, j, value) for every arc with a route variable and a non-zero matrix entry"""
+        values = np.asarray(matrix, dtype=np.float64)
+        rows, cols = np.nonzero((values != 0) & self._arc_mask)
+        return list(zip(rows.tolist(), cols.tolist(), values[rows, cols].tolist()))
+
+    def _candidate_arcs(self) -> np.ndarray:
+        """
+        (n, n) mask of the arcs that get route variables: every off-diagonal arc, or
+        with arc_neighbours set, each location's nearest neighbours (in either
+        direction) plus every arc to and from the depot
+        """
+        num_locations = self._n
+        mask = ~np.eye(num_locations, dtype=bool)
+        if self.arc_neighbours is None or self.arc_neighbours >= num_locations - 1:
+            return mask
+
+        neighbours = self.arc_neighbours
+        # Each row's own zero distance is among the nearest, hence neighbours + 1
+        nearest = np.argsort(self._dist, axis=1, kind='stable')[:, :neighbours + 1]
+        keep = np.zeros((num_locations, num_locations), dtype=bool)
+        np.put_along_axis(keep, nearest, True, axis=1)
+        keep |= keep.T
+        keep[self._depot, :] = True
+        keep[:, self._depot] = True
+        return mask & keep
 
     def _add_basic_constraints(self):
         """Add basic VRP constraints"""
-        num_locations = len(self.problem_data['distance_matrix'])
-        num_vehicles = self.problem_data['num_vehicles']
-        depot = self.problem_data['depot']
+        num_locations = self._n
+        num_vehicles = self._V
+        depot = self._depot
+        x = self.variables['x']
 
         # 1. Each customer is visited exactly once (except depot)
         for j in range(num_locations):
             if j != depot:
-                constraint = 0
-                for i in range(num_locations):
-                    if i != j:
-                        for k in range(num_vehicles):
-                            constraint += self.variables['x'][i][j][k]
+                constraint = pulp.lpSum(x[self._arc_mask[:, j], j, :].ravel())
 
                 self.pulp_problem += constraint == 1, f"visit_customer_{j}"
 
-        # 2. Flow conservation: if a vehicle enters a location, it must leave
-        for i in range(num_locations):
-            for k in range(num_vehicles):
-                inflow = 0
-                outflow = 0
+        # 2-4. Flow conservation and depot start/return, built per vehicle and
+        # merged into the model in one call
+        self.pulp_problem.extend([row for k in range(num_vehicles) for row in self._vehicle_rows(k)])
 
-                for j in range(num_locations):
-                    if i != j:
-                        inflow += self.variables['x'][j][i][k]
-                        outflow += self.variables['x'][i][j][k]
+    def _vehicle_rows(self, k: int) -> List[pulp.LpConstraint]:
+        """Flow conservation and depot start/return rows for vehicle k"""
+        depot = self._depot
+        x = self.variables['x']
+        rows = []
 
-                self.pulp_problem += inflow == outflow, f"flow_conservation_{i}_{k}"
+        # 2. Flow conservation: if a vehicle enters a location, it must leave
+        for i in range(self._n):
+            others = self._arc_mask[i]
+            inflow = pulp.lpSum(x[others, i, k])
+            outflow = pulp.lpSum(x[i, others, k])
 
-        # 3. Each vehicle starts from depot at most once
-        for k in range(num_vehicles):
-            constraint = 0
-            for j in range(num_locations):
-                if j != depot:
-                    constraint += self.variables['x'][depot][j][k]
+            rows.append(pulp.LpConstraint(inflow - outflow, pulp.LpConstraintEQ, f"flow_conservation_{i}_{k}", 0))
 
-            self.pulp_problem += constraint <= 1, f"vehicle_start_{k}"
+        # 3. Each vehicle starts from depot at most once
+        constraint = pulp.lpSum(x[depot, self._arc_mask[depot], k])
+        rows.append(pulp.LpConstraint(constraint, pulp.LpConstraintLE, f"vehicle_start_{k}", 1))
 
-            # Link vehicle usage with depot departure
-            self.pulp_problem += (
-                    self.variables['vehicle_used'][k] == constraint
-            ), f"vehicle_usage_{k}"
+        # Link vehicle usage with depot departure
+        rows.append(pulp.LpConstraint(
+            self.variables['vehicle_used'][k] - constraint, pulp.LpConstraintEQ, f"vehicle_usage_{k}", 0
+        ))
 
         # 4. Each vehicle returns to depot at most once
-        for k in range(num_vehicles):
-            constraint = 0
-            for i in range(num_locations):
-                if i != depot:
-                    constraint += self.variables['x'][i][depot][k]
+        constraint = pulp.lpSum(x[self._arc_mask[:, depot], depot, k])
+        rows.append(pulp.LpConstraint(constraint, pulp.LpConstraintLE, f"vehicle_return_{k}", 1))
 
-            self.pulp_problem += constraint <= 1, f"vehicle_return_{k}"
+        return rows
 
     def _add_processed_constraints(self):
         """Add constraints from natural language processing"""
@@ -312,8 +765,11 @@ class VRPSolverPuLP:
             self._add_capacity_constraint(constraint)
 
         # Add time constraints
+        self._time_windows_applied = False
         for constraint in pulp_constraints['time_constraints']:
             self._add_time_constraint(constraint)
+        if self._time_windows_applied:
+            self._add_arrival_time_linking()
 
         # Add distance constraints
         for constraint in pulp_constraints['distance_constraints']:
@@ -331,33 +787,50 @@ class VRPSolverPuLP:
         """Add vehicle capacity constraint"""
         max_capacity = constraint['max_capacity']
         customers = self.problem_data.get('customers', [])
-        num_vehicles = self.problem_data['num_vehicles']
-        depot = self.problem_data['depot']
+        num_vehicles = self._V
+        depot = self._depot
+        x = self.variables['x']
+
+        demands = self._demands.tolist()
+
+        # Demand of customer j is counted on every arc into j
+        demand_arcs = [
+            (i, j, demands[j])
+            for j in np.flatnonzero(self._demands).tolist()
+            if j != depot
+            for i in np.flatnonzero(self._arc_mask[:len(customers), j]).tolist()
+        ]
 
         # For each vehicle, total demand served must not exceed capacity
-        for k in range(num_vehicles):
-            total_demand = 0
-
-            for j, customer in enumerate(customers):
-                if j != depot:  # Skip depot
-                    demand = customer.get('demand', 0)
-
-                    # If vehicle visits customer j, add its demand
-                    visits_customer = 0
-                    for i in range(len(customers)):
-                        if i != j:
-                            visits_customer += self.variables['x'][i][j][k]
-
-                    total_demand += demand * visits_customer
-
-            self.pulp_problem += (
-                    total_demand <= max_capacity
-            ), f"capacity_vehicle_{k}"
+        self.pulp_problem.extend([
+            pulp.LpConstraint(
+                pulp.LpAffineExpression([(x[i, j, k], demand) for i, j, demand in demand_arcs]),
+                pulp.LpConstraintLE, f"capacity_vehicle_{k}", max_capacity
+            )
+            for k in range(num_vehicles)
+        ])
 
         print(f"✅ Added capacity constraint: max {max_capacity} units per vehicle")
 
     def _add_time_constraint(self, constraint: Dict):
         """Add time window constraint"""
+        window = self._time_window(constraint)
+        if window is None:
+            return
+        customer_index, lower_bound, upper_bound = window
+
+        # Windows become bounds on the customer's arrival variables. Vehicles that skip
+        # the customer are not held to them because the arc linking rows added by
+        # _add_arrival_time_linking relax for unused arcs.
+        for arrival_var in self.variables['arrival_time'][customer_index].values():
+            arrival_var.lowBound = max(arrival_var.lowBound, lower_bound)
+            arrival_var.upBound = upper_bound if arrival_var.upBound is None else min(arrival_var.upBound, upper_bound)
+
+        self._time_windows_applied = True
+        print(f"✅ Added time constraint for customer {constraint.get('customer')}")
+
+    def _time_window(self, constraint: Dict) -> Optional[Tuple[int, float, float]]:
+        """(customer index, earliest, latest) arrival bounds of a time constraint, or None if it sets none"""
         constraint_type = constraint['type']
         customer_id = constraint.get('customer')
         time_bounds = constraint.get('time_bounds', {})
@@ -366,76 +839,94 @@ class VRPSolverPuLP:
         customer_index = self._find_customer_index(customer_id)
         if customer_index is None:
             print(f"⚠️ Customer {customer_id} not found for time constraint")
-            return
-
-        num_vehicles = self.problem_data['num_vehicles']
+            return None
 
         if constraint_type == 'time_window':
             # Customer must be visited within time window
-            lower_bound = time_bounds.get('lower_bound', 0)
-            upper_bound = time_bounds.get('upper_bound', 1440)  # 24 hours
-
-            for k in range(num_vehicles):
-                arrival_var = self.variables['arrival_time'][customer_index][k]
+            return (customer_index, time_bounds.get('lower_bound', 0),
+                    time_bounds.get('upper_bound', 1440))  # 24 hours
 
-                # Only apply constraint if vehicle visits this customer
-                visits = 0
-                for i in range(len(self.problem_data['customers'])):
-                    if i != customer_index:
-                        visits += self.variables['x'][i][customer_index][k]
+        if constraint_type == 'delivery_before':
+            # Customer must be visited before deadline
+            return customer_index, 0, time_bounds.get('rhs', 1440)
 
-                # Big M constraint: if vehicle visits customer, respect time window
-                M = 10000  # Large number
+        print(f"⚠️ Unsupported time constraint type: {constraint_type}")
+        return None
 
-                self.pulp_problem += (
-                        arrival_var >= lower_bound - M * (1 - visits)
-                ), f"time_window_start_{customer_index}_{k}"
+    def _add_arrival_time_linking(self):
+        """
+        Propagate arrival times along the arcs each vehicle uses:
+        arrival[j][k] >= arrival[i][k] + service[i] + travel[i][j] - M[i][j] * (1 - x[i, j, k])
 
-                self.pulp_problem += (
-                        arrival_var <= upper_bound + M * (1 - visits)
-                ), f"time_window_end_{customer_index}_{k}"
+        M[i][j] is the smallest value that relaxes the row when the arc is unused,
+        given the bounds on arrival[i] and arrival[j]. The rows also rule out
+        subtours that do not pass through the depot.
+        """
+        num_locations = self._n
+        num_vehicles = self._V
+        depot = self._depot
+        x = self.variables['x']
+        arrival = self.variables['arrival_time']
+
+        # Windows apply to every vehicle alike, so vehicle 0 carries the bounds for all
+        earliest = np.array([arrival[i][0].lowBound for i in range(num_locations)], dtype=np.float64)
+        window_end = np.array([
+            np.inf if arrival[i][0].upBound is None else arrival[i][0].upBound
+            for i in range(num_locations)
+        ], dtype=np.float64)
+        latest, lead, big_m = self._arrival_link_terms(earliest, window_end)
+        for i in range(num_locations):
+            for k in range(num_vehicles):
+                arrival[i][k].upBound = latest[i]
 
-        elif constraint_type == 'delivery_before':
-            # Customer must be visited before deadline
-            deadline = time_bounds.get('rhs', 1440)
+        for i in range(num_locations):
+            for j in range(num_locations):
+                if self._arc_mask[i, j] and j != depot:
+                    for k in range(num_vehicles):
+                        self.pulp_problem += (
+                                arrival[j][k] >= arrival[i][k] + lead[i, j] - big_m[i, j] * (1 - x[i, j, k])
+                        ), f"arrival_link_{i}_{j}_{k}"
 
-            for k in range(num_vehicles):
-                arrival_var = self.variables['arrival_time'][customer_index][k]
+    def _arrival_link_terms(self, earliest: np.ndarray,
+                            window_end: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Latest arrival per location, and lead time (service plus travel) and big-M
+        per arc, for the arrival linking rows given each location's window bounds
+        """
+        travel = np.asarray(
+            self.problem_data.get('time_matrix', self._dist), dtype=np.float64
+        )
+        num_locations = travel.shape[0]
+        customers = self.problem_data.get('customers', [])
 
-                visits = 0
-                for i in range(len(self.problem_data['customers'])):
-                    if i != customer_index:
-                        visits += self.variables['x'][i][customer_index][k]
+        service = np.zeros(num_locations)
+        for i, customer in enumerate(customers[:num_locations]):
+            service[i] = customer.get('service_time', 0) or 0
 
-                M = 10000
-                self.pulp_problem += (
-                        arrival_var <= deadline + M * (1 - visits)
-                ), f"deadline_{customer_index}_{k}"
+        # No route arrives later than waiting for the latest opening and then
+        # serving and leaving every location along its longest outgoing arc
+        horizon = earliest.max() + float(np.sum(service + travel.max(axis=1)))
+        latest = np.minimum(window_end, horizon)
 
-        print(f"✅ Added time constraint for customer {customer_id}")
+        lead = service[:, np.newaxis] + travel
+        big_m = np.maximum(0.0, latest[:, np.newaxis] + lead - earliest[np.newaxis, :])
+        return latest, lead, big_m
 
     def _add_distance_constraint(self, constraint: Dict):
         """Add maximum distance constraint"""
         max_distance = constraint['max_distance']
-        distance_matrix = self.problem_data['distance_matrix']
-        num_locations = len(distance_matrix)
-        num_vehicles = self.problem_data['num_vehicles']
+        num_vehicles = self._V
+        x = self.variables['x']
+        arcs = self._nonzero_arcs(self._dist)
 
         # For each vehicle, total distance must not exceed maximum
-        for k in range(num_vehicles):
-            total_distance = 0
-
-            for i in range(num_locations):
-                for j in range(num_locations):
-                    if i != j:
-                        total_distance += (
-                                distance_matrix[i][j] *
-                                self.variables['x'][i][j][k]
-                        )
-
-            self.pulp_problem += (
-                    total_distance <= max_distance
-            ), f"max_distance_vehicle_{k}"
+        self.pulp_problem.extend([
+            pulp.LpConstraint(
+                pulp.LpAffineExpression([(x[i, j, k], distance) for i, j, distance in arcs]),
+                pulp.LpConstraintLE, f"max_distance_vehicle_{k}", max_distance
+            )
+            for k in range(num_vehicles)
+        ])
 
         print(f"✅ Added distance constraint: max {max_distance} units per route")
 
@@ -454,22 +945,23 @@ class VRPSolverPuLP:
             return
 
         num_locations = len(self.problem_data['customers'])
+        # Arcs into the location are fixed at 0 through their upper bound, which presolve
+        # removes outright, rather than with one "== 0" row per arc
+        arcs_in = self.variables['x'][:num_locations, location_index, :]
 
         if restriction_type == 'vehicle_location_forbidden':
             # Vehicle cannot visit location
-            for i in range(num_locations):
-                if i != location_index:
-                    constraint_expr = self.variables['x'][i][location_index][vehicle_index]
-                    self.pulp_problem += constraint_expr == 0, f"forbidden_{vehicle_index}_{location_index}_{i}"
+            for var in arcs_in[:, vehicle_index]:
+                if var is not None:
+                    var.upBound = 0
 
         elif restriction_type == 'vehicle_location_exclusive':
             # Only this vehicle can visit location
-            for k in range(self.problem_data['num_vehicles']):
+            for k in range(self._V):
                 if k != vehicle_index:
-                    for i in range(num_locations):
-                        if i != location_index:
-                            constraint_expr = self.variables['x'][i][location_index][k]
-                            self.pulp_problem += constraint_expr == 0, f"exclusive_{k}_{location_index}_{i}"
+                    for var in arcs_in[:, k]:
+                        if var is not None:
+                            var.upBound = 0
 
         print(f"✅ Added vehicle restriction: {restriction_type}")
 
@@ -479,12 +971,10 @@ class VRPSolverPuLP:
         count = constraint['count']
         operator = constraint['operator']
         
-        num_vehicles = self.problem_data['num_vehicles']
+        num_vehicles = self._V
         
         # Sum of all vehicle usage variables
-        total_vehicles_used = 0
-        for k in range(num_vehicles):
-            total_vehicles_used += self.variables['vehicle_used'][k]
+        total_vehicles_used = pulp.lpSum(self.variables['vehicle_used'][k] for k in range(num_vehicles))
         
         if constraint_type == 'min_vehicles':
             self.pulp_problem += (
@@ -516,14 +1006,40 @@ class VRPSolverPuLP:
 
     def _extract_solution(self) -> Dict:
         """Extract solution from solved PuLP problem"""
-        num_locations = len(self.problem_data['distance_matrix'])
-        num_vehicles = self.problem_data['num_vehicles']
-        distance_matrix = self.problem_data['distance_matrix']
+        used = np.array([pulp.value(self.variables['vehicle_used'][k]) > 0.5 for k in range(self._V)])
+        return self._build_solution(
+            self._arc_values(), used, pulp.value(self.pulp_problem.objective), self._proven_optimal()
+        )
+
+    def _build_solution(self, arc_values: np.ndarray, used: np.ndarray,
+                        objective_value: float, is_optimal: bool) -> Dict:
+        """Routes and KPIs from the solved (n, n, V) arc values and vehicle usage flags"""
+        num_locations = self._n
+        num_vehicles = self._V
 
         routes = []
         total_distance = 0
         vehicles_used = 0
 
+        depot = self._depot
+        customers = self.problem_data.get('customers', [])
+        dist = self._dist
+        demand_list = self._demands[:num_locations].tolist()
+        service_list = [customer.get('service_time', 0) for customer in customers[:num_locations]]
+        demands = np.zeros(num_locations)
+        demands[:len(demand_list)] = demand_list
+        service = np.zeros(num_locations)
+        service[:len(service_list)] = service_list
+
+        # Walk every route from the depot, always taking the lowest-numbered unvisited
+        # successor, and total distance, demand and service time along the way
+        stops, lengths, totals = walk_routes(
+            arc_values > 0.5, dist.astype(np.float64), depot, demands, service, used
+        )
+        # Report totals as ints when the inputs were ints, as the dict-based loop did
+        as_int = (dist.dtype.kind in 'iub', np.asarray(demand_list).dtype.kind in 'iub',
+                  np.asarray(service_list).dtype.kind in 'iub')
+
         # Extract routes for each vehicle
         for k in range(num_vehicles):
             route = {
@@ -538,53 +1054,16 @@ class VRPSolverPuLP:
             }
 
             # Check if vehicle is used
-            if pulp.value(self.variables['vehicle_used'][k]) > 0.5:
+            if used[k]:
                 vehicles_used += 1
 
-                # Find the route by following the x variables
-                current_location = self.problem_data['depot']
-                route['route'].append(current_location)
-
-                visited = set([current_location])
-
-                while True:
-                    next_location = None
-
-                    # Find next location in route
-                    for j in range(num_locations):
-                        if j not in visited:
-                            if (current_location in self.variables['x'] and
-                                    j in self.variables['x'][current_location] and
-                                    k in self.variables['x'][current_location][j]):
-
-                                x_val = pulp.value(self.variables['x'][current_location][j][k])
-                                if x_val and x_val > 0.5:
-                                    next_location = j
-                                    break
-
-                    if next_location is None:
-                        # Return to depot
-                        if current_location != self.problem_data['depot']:
-                            route['route'].append(self.problem_data['depot'])
-                            route['distance'] += distance_matrix[current_location][self.problem_data['depot']]
-                        break
-                    else:
-                        route['route'].append(next_location)
-                        route['distance'] += distance_matrix[current_location][next_location]
-                        visited.add(next_location)
-                        current_location = next_location
-
-                        # Add customer info and calculate KPIs
-                        if next_location != self.problem_data['depot']:
-                            customers = self.problem_data.get('customers', [])
-                            if next_location < len(customers):
-                                customer = customers[next_location]
-                                route['customers'].append(customer)
-                                
-                                # Update KPIs
-                                route['total_demand'] += customer.get('demand', 0)
-                                route['customer_count'] += 1
-                                route['service_time'] += customer.get('service_time', 0)
+                route['route'] = stops[k, :lengths[k]].tolist()
+                route['distance'], route['total_demand'], route['service_time'] = (
+                    int(value) if integral else value for value, integral in zip(totals[k].tolist(), as_int)
+                )
+                route['customers'] = [customers[stop] for stop in route['route'][1:]
+                                      if stop != depot and stop < len(customers)]
+                route['customer_count'] = len(route['customers'])
 
             if len(route['route']) > 1:  # Vehicle has a route
                 # Calculate final KPIs
@@ -602,18 +1081,15 @@ class VRPSolverPuLP:
                 routes.append(route)
                 total_distance += route['distance']
 
-        # Calculate objective value
-        objective_value = pulp.value(self.pulp_problem.objective)
-
         return {
             'routes': routes,
             'total_distance': total_distance,
             'objective_value': objective_value,
             'vehicles_used': vehicles_used,
             'total_vehicles': num_vehicles,
-            'solver': 'pulp_cbc',
+            'solver': _SOLVER_LABELS.get(self.solver_name, f"pulp_{self.solver_name}".lower()),
             'constraint_count': len(self.processed_constraints),
-            'is_optimal': self.pulp_problem.status == pulp.LpStatusOptimal
+            'is_optimal': is_optimal
         }
 
     def get_constraint_summary(self) -> Dict:
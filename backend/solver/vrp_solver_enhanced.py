@@ -57,11 +57,10 @@ def calculate_pattern_confidence(pattern_result, prompt: str) -> float:
     if not pattern_result:
         return 0.0
     
-    constraint_type, match_info = pattern_result
     confidence = 0.6
     
     # Boost for numeric values
-    params = match_info.get('parameters', {})
+    params = pattern_result.parameters
     for key, value in params.items():
         if value and str(value).replace('.', '').isdigit():
             confidence += 0.15
@@ -141,7 +140,7 @@ def parse_constraints_intelligently(gpt_prompt, scenario_params):
                     'constraint_type': parsed_constraint.constraint_type,
                     'subtype': parsed_constraint.subtype,
                     'parameters': parsed_constraint.parameters or {},
-                    'entities': [{'type': e.type, 'id': e.id} for e in (parsed_constraint.entities or [])],
+                    'entities': [{'type': e.type, 'id': e.sid} for e in (parsed_constraint.entities or [])],
                     'mathematical_format': parsed_constraint.mathematical_description,
                     'parsing_method': parsed_constraint.parsing_method,
                     'confidence': parsed_constraint.confidence,